@@ -0,0 +1,347 @@
+"""
+Throughput benchmark for the pyboy environments.
+
+Runs random `sample_action` rollouts over a matrix of tasks, action frequencies, window modes and
+observation types, each configuration in a fresh process so peak RSS is measured in isolation.
+Package import times are measured the same way to keep worker start up cheap.
+
+python benchmark.py -o bench.json
+python benchmark.py -o bench.json --baseline previous_bench.json --tolerance 0.1
+python benchmark.py -o imports.json --imports_only
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _observe_state(env) -> None:
+    pass
+
+
+def _observe_frame(env) -> None:
+    env.frame()
+
+
+def _observe_game_area(env) -> None:
+    env.game_area()
+
+
+# Extra observation fetched after every step on top of the task's own state
+OBSERVATIONS = {
+    "state": _observe_state,
+    "frame": _observe_frame,
+    "game_area": _observe_game_area,
+}
+
+
+# Modules whose import cost is tracked, and heavy dependencies they must not pull in eagerly
+IMPORT_MODULES = ["pyboy_environment.suite", "pyboy_environment.vector_env"]
+HEAVY_MODULES = ["torch", "cv2", "pyboy"]
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, *[name for name in {heavy} if name in sys.modules])
+"""
+
+
+def measure_import(module: str, repeats: int) -> dict:
+    # Each sample imports the module in a fresh interpreter
+    samples, loaded = [], []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES),
+            ],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        samples.append(float(output[0]))
+        loaded = output[1:]
+    return {
+        "module": module,
+        "median_s": float(np.median(samples)),
+        "min_s": float(np.min(samples)),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def config_key(config: dict) -> tuple:
+    return (
+        config["domain"],
+        config["task"],
+        config["act_freq"],
+        config["headless"],
+        config["observation"],
+    )
+
+
+def run_config(config: dict, steps: int, resets: int, seed: int) -> dict:
+    # Imported here so the parent process stays free of emulator state
+    from pyboy_environment import suite
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+    result = dict(config)
+
+    start = time.perf_counter()
+    env = suite.make(
+        config["domain"],
+        config["task"],
+        config["act_freq"],
+        headless=config["headless"],
+    )
+    result["construct_s"] = time.perf_counter() - start
+
+    env.set_seed(seed)
+    observe = OBSERVATIONS[config["observation"]]
+    if config["observation"] == "frame":
+        env.needs_pixels = True
+
+    env.reset()
+    latencies = np.empty(steps, dtype=np.int64)
+    episode_resets = 0
+
+    start = time.perf_counter()
+    for i in range(steps):
+        step_start = time.perf_counter_ns()
+        _, _, done, truncated = env.step(env.sample_action())
+        observe(env)
+        latencies[i] = time.perf_counter_ns() - step_start
+        if done or truncated:
+            env.reset()
+            episode_resets += 1
+    step_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(resets):
+        env.reset()
+    reset_time = time.perf_counter() - start
+
+    latencies_ms = latencies / 1e6
+    result.update(
+        {
+            "steps": steps,
+            "steps_per_sec": steps / step_time,
+            "frames_per_sec": steps * config["act_freq"] / step_time,
+            "episode_resets": episode_resets,
+            "resets": resets,
+            "resets_per_sec": resets / reset_time if resets else None,
+            "latency_ms": {
+                "mean": float(latencies_ms.mean()),
+                "p50": float(np.percentile(latencies_ms, 50)),
+                "p90": float(np.percentile(latencies_ms, 90)),
+                "p99": float(np.percentile(latencies_ms, 99)),
+                "max": float(latencies_ms.max()),
+            },
+            # ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+    )
+
+    env.pyboy.stop(save=False)
+    return result
+
+
+def run_isolated(config: dict, steps: int, resets: int, seed: int) -> dict:
+    # A fresh interpreter per configuration keeps peak RSS and emulator state independent
+    context = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        future = executor.submit(run_config, config, steps, resets, seed)
+        try:
+            return future.result()
+        except Exception as error:
+            return dict(config, error=f"{type(error).__name__}: {error}")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    baseline_by_key = {
+        config_key(result): result for result in baseline if "error" not in result
+    }
+
+    regressions = []
+    for result in results:
+        previous = baseline_by_key.get(config_key(result))
+        if previous is None or "error" in result:
+            continue
+
+        ratio = result["steps_per_sec"] / previous["steps_per_sec"]
+        result["baseline_ratio"] = ratio
+        if ratio < 1.0 - tolerance:
+            regressions.append(
+                f"{config_key(result)}: {result['steps_per_sec']:.1f} steps/sec vs "
+                f"{previous['steps_per_sec']:.1f} ({(ratio - 1.0) * 100:+.1f}%)"
+            )
+    return regressions
+
+
+def compare_imports(
+    imports: list[dict], baseline: list[dict], tolerance: float
+) -> list[str]:
+    baseline_by_module = {entry["module"]: entry for entry in baseline}
+
+    regressions = []
+    for entry in imports:
+        if entry["heavy_modules_loaded"]:
+            regressions.append(
+                f"import {entry['module']} loads {', '.join(entry['heavy_modules_loaded'])}"
+            )
+
+        previous = baseline_by_module.get(entry["module"])
+        if previous is not None and entry["median_s"] > previous["median_s"] * (
+            1.0 + tolerance
+        ):
+            regressions.append(
+                f"import {entry['module']}: {entry['median_s'] * 1e3:.1f} ms vs "
+                f"{previous['median_s'] * 1e3:.1f} ms"
+            )
+    return regressions
+
+
+def get_args():
+    parse_args = argparse.ArgumentParser()
+
+    parse_args.add_argument("-o", "--output", type=str, required=True)
+
+    parse_args.add_argument(
+        "--tasks", type=str, nargs="+", default=["mario:run", "pokemon:brock"]
+    )
+    parse_args.add_argument("--act_freq", type=int, nargs="+", default=[4, 24])
+    parse_args.add_argument("--headless", type=int, nargs="+", default=[1, 0])
+    parse_args.add_argument(
+        "--observations",
+        type=str,
+        nargs="+",
+        default=list(OBSERVATIONS),
+        choices=list(OBSERVATIONS),
+    )
+
+    parse_args.add_argument("--steps", type=int, default=1000)
+    parse_args.add_argument("--resets", type=int, default=20)
+    parse_args.add_argument("--seed", type=int, default=10)
+
+    parse_args.add_argument("--import_repeats", type=int, default=5)
+    parse_args.add_argument(
+        "--imports_only", action="store_true", help="Only benchmark import times"
+    )
+
+    parse_args.add_argument("--baseline", type=str, default=None)
+    parse_args.add_argument("--tolerance", type=float, default=0.1)
+
+    return parse_args.parse_args()
+
+
+def main():
+    args = get_args()
+
+    configs = []
+    for task, act_freq, headless, observation in itertools.product(
+        args.tasks, args.act_freq, args.headless, args.observations
+    ):
+        domain, task = task.split(":")
+        configs.append(
+            {
+                "domain": domain,
+                "task": task,
+                "act_freq": act_freq,
+                "headless": bool(headless),
+                "observation": observation,
+            }
+        )
+
+    imports = []
+    for module in IMPORT_MODULES:
+        entry = measure_import(module, args.import_repeats)
+        logging.info(
+            f"import {module}: {entry['median_s'] * 1e3:.1f} ms, "
+            f"heavy modules loaded: {entry['heavy_modules_loaded']}"
+        )
+        imports.append(entry)
+
+    if args.imports_only:
+        configs = []
+
+    results = []
+    for config in configs:
+        logging.info(f"Benchmarking {config}")
+        result = run_isolated(config, args.steps, args.resets, args.seed)
+        if "error" in result:
+            logging.warning(f"Failed {config}: {result['error']}")
+        else:
+            logging.info(
+                f"{result['steps_per_sec']:.1f} steps/sec, "
+                f"p99 {result['latency_ms']['p99']:.2f} ms, "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB"
+            )
+        results.append(result)
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        regressions += compare_imports(
+            imports, baseline.get("imports", []), args.tolerance
+        )
+        for regression in regressions:
+            logging.error(f"Regression {regression}")
+
+    report = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "steps": args.steps,
+        "resets": args.resets,
+        "seed": args.seed,
+        "imports": imports,
+        "results": results,
+        "regressions": regressions,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+
+    logging.info(f"Saved benchmark results to {args.output}")
+
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
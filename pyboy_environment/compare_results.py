@@ -52,14 +52,41 @@ def get_args():
 
     parse_args.add_argument("-r", "--results_path", type=str, required=True)
 
+    parse_args.add_argument(
+        "--index",
+        type=str,
+        default=None,
+        help="SQLite results index to update and rank from instead of reading every result",
+    )
+
+    parse_args.add_argument("--round", type=str, default=None)
+
+    parse_args.add_argument("--top", type=int, default=None)
+
     return parse_args.parse_args()
 
 
+def log_ranking(results):
+    for i, result in enumerate(results):
+        logging.info(
+            f"Rank {i + 1}: {result['upi']} - Badges: {result['badges']} Caught: {result['caught_pokemon']} Seen: {result['seen_pokemon']} Levels: {np.mean(result['levels'])} XP: {np.mean(result['xp'])}"
+        )
+
+
 def main():
     args = get_args()
 
     results_path = args.results_path
 
+    if args.index is not None:
+        # Imported here so the plain comparison still runs as a standalone script
+        from pyboy_environment.results_index import ResultsIndex
+
+        with ResultsIndex(args.index) as index:
+            index.ingest(results_path)
+            log_ranking(index.top(args.top, args.round))
+        return
+
     result_directories = glob.glob(f"{results_path}/*")
     logging.info(f"Found {len(result_directories)} results directories")
     logging.info(f"Results directories: {result_directories}")
@@ -79,10 +106,7 @@ def main():
 
     results = sorted(results, key=cmp_to_key(compare_performance))
 
-    for i, result in enumerate(results):
-        logging.info(
-            f"Rank {i + 1}: {result['upi']} - Badges: {result['badges']} Caught: {result['caught_pokemon']} Seen: {result['seen_pokemon']} Levels: {np.mean(result['levels'])} XP: {np.mean(result['xp'])}"
-        )
+    log_ranking(results[: args.top])
 
 
 if __name__ == "__main__":
@@ -1,3 +1,16 @@
+import importlib
+
 from .pyboy_environment import PyboyEnvironment
-from .mario import MarioEnvironment
-from .pokemon import PokemonEnvironment
+
+# The domain environments pull in their game stacks, load them only when asked for
+_LAZY_ENVIRONMENTS = {
+    "MarioEnvironment": ".mario",
+    "PokemonEnvironment": ".pokemon",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ENVIRONMENTS:
+        module = importlib.import_module(_LAZY_ENVIRONMENTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
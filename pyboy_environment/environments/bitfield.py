@@ -0,0 +1,51 @@
+import numpy as np
+
+# Number of set bits in every byte value
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(
+    axis=1, dtype=np.uint8
+)
+
+
+def popcount(block: np.ndarray) -> np.ndarray:
+    # Set bits per byte of a uint8 array
+    return POPCOUNT[block]
+
+
+def count_bits(block: np.ndarray) -> int:
+    return int(POPCOUNT[block].sum())
+
+
+def read_bit(value: int, bit: int) -> bool:
+    return (value >> bit) & 1 == 1
+
+
+def unpack_bits(block: np.ndarray) -> np.ndarray:
+    # Flag i of the block is bit i % 8 of byte i // 8, as the game indexes its flag arrays
+    return np.unpackbits(block, bitorder="little")
+
+
+class BitfieldCounter:
+    """
+    Running count of set bits in a byte range that only rescans the bytes that changed.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.previous = np.zeros(size, dtype=np.uint8)
+        self.counts = np.zeros(size, dtype=np.uint8)
+        self.total = 0
+
+    def update(self, block: np.ndarray) -> int:
+        changed = np.flatnonzero(block != self.previous)
+        if changed.size:
+            counts = POPCOUNT[block[changed]]
+            self.total += int(counts.sum(dtype=np.int64)) - int(
+                self.counts[changed].sum(dtype=np.int64)
+            )
+            self.counts[changed] = counts
+            self.previous[changed] = block[changed]
+        return self.total
+
+    def reset(self) -> None:
+        self.previous.fill(0)
+        self.counts.fill(0)
+        self.total = 0
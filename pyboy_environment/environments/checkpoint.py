@@ -0,0 +1,50 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+
+def save_arrays(path: str, arrays: dict[str, np.ndarray]) -> None:
+    # Written next to the target and renamed, so readers never see a partial file
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temp_path, path)
+
+
+def load_arrays(path: str) -> dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+class BackgroundWriter:
+    """
+    Saves array snapshots from a worker thread, at most one write in flight.
+    """
+
+    def __init__(self) -> None:
+        self._thread: threading.Thread | None = None
+
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, path: str, arrays: dict[str, np.ndarray]) -> bool:
+        # Callers pass copies - a snapshot still being written is skipped rather than queued
+        if self.busy():
+            return False
+        self._thread = threading.Thread(
+            target=self._write, args=(path, arrays), daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def _write(self, path: str, arrays: dict[str, np.ndarray]) -> None:
+        try:
+            save_arrays(path, arrays)
+        except OSError:
+            logging.exception(f"Failed to write checkpoint {path}")
+
+    def wait(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
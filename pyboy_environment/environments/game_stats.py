@@ -0,0 +1,83 @@
+from typing import Any, Callable
+
+
+class GameStats(dict):
+    """
+    Dict of game stats where each field is decoded from the emulator on first access.
+
+    Fields keep their declaration order when iterated, printed or dumped to JSON, which
+    resolves every remaining field first. Use `copy()` for a plain dict.
+    """
+
+    def __init__(self, fields: dict[str, Callable[[], Any]]) -> None:
+        super().__init__()
+        self._fields = fields
+        self._extra_keys = 0
+
+        # json's C encoder writes "{}" for an empty dict without calling items()
+        for key in fields:
+            self.__missing__(key)
+            break
+
+    def __missing__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        value = self._fields[key]()
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self._fields and not dict.__contains__(self, key):
+            self._extra_keys += 1
+        dict.__setitem__(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields or dict.__contains__(self, key)
+
+    def __len__(self) -> int:
+        return len(self._fields) + self._extra_keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, dict):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other: object) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def resolve(self) -> "GameStats":
+        for key in self._fields:
+            if not dict.__contains__(self, key):
+                self.__missing__(key)
+        return self
+
+    def keys(self) -> list[str]:
+        self.resolve()
+        extra = [key for key in dict.keys(self) if key not in self._fields]
+        return list(self._fields) + extra
+
+    def values(self) -> list[Any]:
+        return [dict.__getitem__(self, key) for key in self.keys()]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(key, dict.__getitem__(self, key)) for key in self.keys()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    def __reduce__(self):
+        # Fields are bound to the live emulator, pickle the decoded values instead
+        return (dict, (self.items(),))
@@ -9,6 +9,7 @@ https://github.com/lixado/PyBoy-RL/blob/main/AISettings/MarioAISettings.py
 """
 
 from abc import ABCMeta
+from typing import Any
 
 import numpy as np
 from pyboy.utils import WindowEvent
@@ -24,6 +25,7 @@ class MarioEnvironment(PyboyEnvironment, metaclass=ABCMeta):
         release_button: list[WindowEvent],
         emulation_speed: int = 0,
         headless: bool = False,
+        telemetry_sink: Any = None,
     ) -> None:
 
         super().__init__(
@@ -36,6 +38,7 @@ class MarioEnvironment(PyboyEnvironment, metaclass=ABCMeta):
             release_button=release_button,
             emulation_speed=emulation_speed,
             headless=headless,
+            telemetry_sink=telemetry_sink,
         )
 
     def _get_state(self) -> np.ndarray:
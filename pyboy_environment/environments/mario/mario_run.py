@@ -1,6 +1,6 @@
 import logging
 from functools import cached_property
-from typing import Dict, List
+from typing import Any, Dict, List
 
 import numpy as np
 from pyboy.utils import WindowEvent
@@ -9,11 +9,15 @@ from pyboy_environment.environments.mario.mario_environment import MarioEnvironm
 
 
 class MarioRun(MarioEnvironment):
+    # Game area and scroll positions come from the tile maps and scanline registers
+    needs_pixels = False
+
     def __init__(
         self,
         act_freq: int,
         emulation_speed: int = 0,
         headless: bool = False,
+        telemetry_sink: Any = None,
     ) -> None:
 
         valid_actions: List[WindowEvent] = [
@@ -40,6 +44,7 @@ class MarioRun(MarioEnvironment):
             release_button=release_button,
             emulation_speed=emulation_speed,
             headless=headless,
+            telemetry_sink=telemetry_sink,
         )
 
         self.max_level_progress = 0
@@ -74,12 +79,11 @@ class MarioRun(MarioEnvironment):
         # Toggles the buttons being on or off
         for i, toggle in enumerate(action):
             if toggle >= 0.5:
-                self.pyboy.send_input(self.valid_actions[i])
+                self._send_input(self.valid_actions[i])
             else:
-                self.pyboy.send_input(self.release_button[i])
+                self._send_input(self.release_button[i])
 
-        for i in range(self.act_freq):
-            self.pyboy.tick()
+        self._tick(self.act_freq)
 
     def _calculate_reward(self, new_state: Dict[str, int]) -> float:
         reward_stats = {
@@ -0,0 +1,102 @@
+import json
+import time
+
+import numpy as np
+
+# Bucket i counts samples below 2**i microseconds, the last bucket takes everything slower
+HISTOGRAM_BUCKETS = 24
+
+
+class PerfStats:
+    """
+    Cumulative timings and log2 latency histograms per named phase.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, list] = {}
+
+    def record(self, phase: str, nanoseconds: int) -> None:
+        entry = self.phases.get(phase)
+        if entry is None:
+            # count, total ns, min ns, max ns, histogram
+            entry = [0, 0, nanoseconds, nanoseconds, [0] * HISTOGRAM_BUCKETS]
+            self.phases[phase] = entry
+
+        entry[0] += 1
+        entry[1] += nanoseconds
+        if nanoseconds < entry[2]:
+            entry[2] = nanoseconds
+        if nanoseconds > entry[3]:
+            entry[3] = nanoseconds
+        entry[4][min((nanoseconds // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def timer(self) -> "PhaseTimer":
+        return PhaseTimer(self)
+
+    def reset(self) -> None:
+        self.phases.clear()
+
+    def _percentile(self, histogram: list[int], count: int, fraction: float) -> float:
+        # Upper edge of the bucket holding the percentile, in microseconds
+        target = fraction * count
+        cumulative = np.cumsum(histogram)
+        bucket = int(np.searchsorted(cumulative, target))
+        return float(2**bucket)
+
+    def summary(self) -> dict[str, dict]:
+        summary = {}
+        for phase, (count, total, minimum, maximum, histogram) in self.phases.items():
+            summary[phase] = {
+                "count": count,
+                "total_s": total / 1e9,
+                "mean_us": total / count / 1e3,
+                "min_us": minimum / 1e3,
+                "max_us": maximum / 1e3,
+                "p50_us": self._percentile(histogram, count, 0.5),
+                "p90_us": self._percentile(histogram, count, 0.9),
+                "p99_us": self._percentile(histogram, count, 0.99),
+                "histogram_us": {
+                    f"<{2**i}" if i < HISTOGRAM_BUCKETS - 1 else f">={2**(i - 1)}": n
+                    for i, n in enumerate(histogram)
+                    if n > 0
+                },
+            }
+        return summary
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=4)
+
+
+class PhaseTimer:
+    """
+    Records consecutive phases of one call, each from the previous mark to the next.
+    """
+
+    def __init__(self, stats: PerfStats) -> None:
+        self.stats = stats
+        self.start = self.last = time.perf_counter_ns()
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter_ns()
+        self.stats.record(phase, now - self.last)
+        self.last = now
+
+    def finish(self, phase: str) -> None:
+        # Records the whole call, from creation to the last mark
+        self.stats.record(phase, self.last - self.start)
+
+
+class NullTimer:
+    """
+    Stands in for PhaseTimer while profiling is off.
+    """
+
+    def mark(self, phase: str) -> None:
+        pass
+
+    def finish(self, phase: str) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
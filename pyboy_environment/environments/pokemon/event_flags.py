@@ -0,0 +1,84 @@
+import numpy as np
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/wram.asm
+EVENT_FLAGS_START = 0xD747  # wEventFlags
+EVENT_FLAGS_END = 0xD886
+EVENT_FLAG_COUNT = (EVENT_FLAGS_END - EVENT_FLAGS_START) * 8
+
+
+def event_flag(addr: int, bit: int) -> int:
+    # Flag index as used by pokered's event constants
+    return (addr - EVENT_FLAGS_START) * 8 + bit
+
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/constants/event_constants.asm
+EVENT_NAMES = {
+    0x000: "EVENT_FOLLOWED_OAK_INTO_LAB",
+    0x018: "EVENT_GOT_TOWN_MAP",
+    0x019: "EVENT_ENTERED_BLUES_HOUSE",
+    0x020: "EVENT_FOLLOWED_OAK_INTO_LAB_2",
+    0x021: "EVENT_OAK_ASKED_TO_CHOOSE_MON",
+    0x022: "EVENT_GOT_STARTER",
+    0x023: "EVENT_BATTLED_RIVAL_IN_OAKS_LAB",
+    0x024: "EVENT_GOT_POKEBALLS_FROM_OAK",
+    0x025: "EVENT_GOT_POKEDEX",
+    0x027: "EVENT_OAK_APPEARED_IN_PALLET",
+    0x038: "EVENT_OAK_GOT_PARCEL",
+    0x039: "EVENT_GOT_OAKS_PARCEL",
+    0x068: "EVENT_BOUGHT_MUSEUM_TICKET",
+    0x069: "EVENT_GOT_OLD_AMBER",
+    0x072: "EVENT_BEAT_PEWTER_GYM_TRAINER_0",
+    0x076: "EVENT_GOT_TM34",
+    0x077: "EVENT_BEAT_BROCK",
+}
+EVENT_FLAGS = {name: flag for flag, name in EVENT_NAMES.items()}
+
+
+def event_name(flag: int) -> str:
+    return EVENT_NAMES.get(flag, f"EVENT_{flag:03X}")
+
+
+class EventFlagTracker:
+    """
+    Remembers the last event flag block and reports which flags flipped since.
+
+    Only bytes that differ from the previous block are unpacked, so an update costs one
+    vectorized compare plus work proportional to the number of changed flags.
+    """
+
+    def __init__(self) -> None:
+        self.block = np.zeros(EVENT_FLAGS_END - EVENT_FLAGS_START, dtype=np.uint8)
+        self.set_flags: list[int] = []
+        self.cleared_flags: list[int] = []
+
+    def reset(self, block: np.ndarray) -> None:
+        # New baseline without reporting any changes, e.g. after loading a state
+        self.block[:] = block
+        self.set_flags = []
+        self.cleared_flags = []
+
+    def update(self, block: np.ndarray) -> list[int]:
+        set_flags, cleared_flags = [], []
+        for index in np.flatnonzero(block != self.block).tolist():
+            new, old = int(block[index]), int(self.block[index])
+            flipped = new ^ old
+            for bit in range(8):
+                if flipped >> bit & 1:
+                    flag = index * 8 + bit
+                    if new >> bit & 1:
+                        set_flags.append(flag)
+                    else:
+                        cleared_flags.append(flag)
+            self.block[index] = new
+
+        self.set_flags = set_flags
+        self.cleared_flags = cleared_flags
+        return set_flags
+
+    def is_set(self, flag: int | str) -> bool:
+        if isinstance(flag, str):
+            flag = EVENT_FLAGS[flag]
+        return (int(self.block[flag >> 3]) >> (flag & 7)) & 1 == 1
+
+    def names(self, flags: list[int]) -> list[str]:
+        return [event_name(flag) for flag in flags]
@@ -0,0 +1,192 @@
+import numpy as np
+from numpy.lib import recfunctions
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/wram.asm
+PARTY_COUNT = 0xD163  # wPartyCount
+PARTY_SPECIES = 0xD164  # wPartySpecies - one id per slot, 0xFF terminated
+PARTY_MONS = 0xD16B  # wPartyMons - six party_struct records
+PARTY_LENGTH = 6
+PARTY_MON_SIZE = 44
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/macros/ram.asm
+# party_struct, multi-byte values are big endian
+PARTY_MON_DTYPE = np.dtype(
+    {
+        "names": [
+            "species",
+            "hp",
+            "box_level",
+            "status",
+            "types",
+            "catch_rate",
+            "moves",
+            "ot_id",
+            "exp",
+            "hp_exp",
+            "attack_exp",
+            "defense_exp",
+            "speed_exp",
+            "special_exp",
+            "dvs",
+            "pp",
+            "level",
+            "max_hp",
+            "attack",
+            "defense",
+            "speed",
+            "special",
+        ],
+        "formats": [
+            "u1",
+            ">u2",
+            "u1",
+            "u1",
+            ("u1", 2),
+            "u1",
+            ("u1", 4),
+            ">u2",
+            ("u1", 3),
+            ">u2",
+            ">u2",
+            ">u2",
+            ">u2",
+            ">u2",
+            ("u1", 2),
+            ("u1", 4),
+            "u1",
+            ">u2",
+            ">u2",
+            ">u2",
+            ">u2",
+            ">u2",
+        ],
+        "offsets": [
+            0,
+            1,
+            3,
+            4,
+            5,
+            7,
+            8,
+            12,
+            14,
+            17,
+            19,
+            21,
+            23,
+            25,
+            27,
+            29,
+            33,
+            34,
+            36,
+            38,
+            40,
+            42,
+        ],
+        "itemsize": PARTY_MON_SIZE,
+    }
+)
+
+# Weights of the three big endian experience bytes
+EXP_WEIGHTS = np.array([256 * 256, 256, 1], dtype=np.int64)
+
+# Per slot columns of party_observation, followed by type 1, type 2 and experience
+PARTY_OBSERVATION_FIELDS = [
+    "species",
+    "hp",
+    "max_hp",
+    "level",
+    "status",
+    "attack",
+    "defense",
+    "speed",
+    "special",
+]
+
+
+def decode_party(block: np.ndarray) -> np.ndarray:
+    # Zero-copy view of the PARTY_LENGTH * PARTY_MON_SIZE bytes at PARTY_MONS
+    return block.view(PARTY_MON_DTYPE)
+
+
+def party_exp(party: np.ndarray) -> np.ndarray:
+    return party["exp"].astype(np.int64) @ EXP_WEIGHTS
+
+
+def party_observation(party: np.ndarray, party_size: int) -> np.ndarray:
+    observation = np.zeros(
+        (PARTY_LENGTH, len(PARTY_OBSERVATION_FIELDS) + 3), dtype=np.float32
+    )
+    size = min(party_size, PARTY_LENGTH)
+    members = party[:size]
+
+    observation[:size, : len(PARTY_OBSERVATION_FIELDS)] = (
+        recfunctions.structured_to_unstructured(
+            members[PARTY_OBSERVATION_FIELDS], dtype=np.float32
+        )
+    )
+    observation[:size, -3:-1] = members["types"]
+    observation[:size, -1] = party_exp(members)
+    return observation
+
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/wram.asm
+ENEMY_MON = 0xCFE5  # wEnemyMon - battle_struct of the opponent's active mon
+BATTLE_MON = 0xD014  # wBattleMon - battle_struct of the player's active mon
+IS_IN_BATTLE = 0xD057  # wIsInBattle - 0 none, 1 wild, 2 trainer, 0xFF lost
+BATTLE_TYPE = 0xD05A  # wBattleType - 0 normal, 1 old man tutorial, 2 safari zone
+BATTLE_BLOCK_END = BATTLE_TYPE + 1
+BATTLE_MON_SIZE = 29
+
+NOT_IN_BATTLE = 0
+WILD_BATTLE = 1
+TRAINER_BATTLE = 2
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/macros/ram.asm
+# battle_struct, the in battle copy of a mon
+BATTLE_MON_DTYPE = np.dtype(
+    {
+        "names": [
+            "species",
+            "hp",
+            "party_position",
+            "status",
+            "types",
+            "catch_rate",
+            "moves",
+            "dvs",
+            "level",
+            "max_hp",
+            "attack",
+            "defense",
+            "speed",
+            "special",
+            "pp",
+        ],
+        "formats": [
+            "u1",
+            ">u2",
+            "u1",
+            "u1",
+            ("u1", 2),
+            "u1",
+            ("u1", 4),
+            ("u1", 2),
+            "u1",
+            ">u2",
+            ">u2",
+            ">u2",
+            ">u2",
+            ">u2",
+            ("u1", 4),
+        ],
+        "offsets": [0, 1, 3, 4, 5, 7, 8, 12, 14, 15, 17, 19, 21, 23, 25],
+        "itemsize": BATTLE_MON_SIZE,
+    }
+)
+
+
+def decode_battle_mon(block: np.ndarray, offset: int) -> np.void:
+    # battle_struct starting `offset` bytes into a block read from ENEMY_MON
+    return block[offset : offset + BATTLE_MON_SIZE].view(BATTLE_MON_DTYPE)[0]
@@ -1,16 +1,77 @@
+import bisect
 import random
-from functools import cached_property
+import sys
+from functools import cached_property, partial
 from abc import abstractmethod
+from typing import Any, NamedTuple
 
 import numpy as np
 from pyboy.utils import WindowEvent
 
+from pyboy_environment.environments import bitfield
+from pyboy_environment.environments.game_stats import GameStats
 from pyboy_environment.environments.pyboy_environment import PyboyEnvironment
+from pyboy_environment.environments.state_archive import StateArchive
+from pyboy_environment.environments.pokemon import memory_layout as layout
+from pyboy_environment.environments.pokemon.event_flags import (
+    EVENT_FLAGS_END,
+    EVENT_FLAGS_START,
+    EventFlagTracker,
+)
 from pyboy_environment.environments.pokemon import pokemon_constants as pkc
-import torch
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/wram.asm
+WALK_COUNTER = 0xCFC5  # wWalkCounter - non-zero while a step is animating
+JOY_IGNORE = 0xCD6B  # wJoyIgnore - buttons masked while scripts and their text run
+STATUS_FLAGS = 0xD730  # wd730 - bit 0 scripted NPC movement, bit 5 ignore input, bit 7 simulated joypad
+MOVEMENT_FLAGS = 0xD736  # wd736 - bits 0-1 stepping out of a door, bit 2 on a warp, bit 6 ledge jump
+STATUS_FLAGS_BUSY = 0b10100001
+# Bit 2 stays set while standing on a warp tile, the player can still move from there
+MOVEMENT_FLAGS_BUSY = 0b01000011
+LCDC = 0xFF40  # bit 3 selects the background map, bit 4 clear means signed tile ids
+SCY = 0xFF42
+SCX = 0xFF43
+BG_MAP_LOW = 0x9800
+BG_MAP_HIGH = 0x9C00
+POKEDEX_OWNED = 0xD2F7  # wPokedexOwned - one bit per species
+POKEDEX_SEEN = 0xD30A  # wPokedexSeen
+POKEDEX_END = 0xD31D
+
+# Game stats that can split archive cells, list stats contribute their sum
+ARCHIVE_SCALAR_FEATURES = frozenset(
+    ("party_size", "badges", "caught_pokemon", "seen_pokemon", "money")
+)
+ARCHIVE_SUMMED_FEATURES = frozenset(("levels", "xp", "events"))
+
+
+class BattleState(NamedTuple):
+    # wIsInBattle, see memory_layout.NOT_IN_BATTLE, WILD_BATTLE and TRAINER_BATTLE
+    kind: int
+    battle_type: int
+    enemy_species: int
+    enemy_level: int
+    enemy_hp: int
+    enemy_max_hp: int
+    player_species: int
+    player_level: int
+    player_hp: int
+    player_max_hp: int
+
+    @property
+    def in_battle(self) -> bool:
+        return self.kind in (layout.WILD_BATTLE, layout.TRAINER_BATTLE)
 
 
 class PokemonEnvironment(PyboyEnvironment):
+    snapshot_wram = True
+    # Battle mons through the event flags, every address the game stats decode
+    wram_span = (layout.ENEMY_MON, EVENT_FLAGS_END)
+    snapshot_fields = PyboyEnvironment.snapshot_fields + (
+        "event_flags",
+        "last_action_frames",
+        "archive_start_steps",
+    )
+
     def __init__(
         self,
         act_freq: int,
@@ -20,7 +81,43 @@ class PokemonEnvironment(PyboyEnvironment):
         emulation_speed: int = 0,
         headless: bool = False,
         init_name: str = "has_pokedex.state",
+        adaptive_frame_skip: bool = False,
+        max_action_frames: int | None = None,
+        telemetry_sink: Any = None,
     ) -> None:
+        self._game_stats = None
+        self._game_stats_key = None
+        self._battle_state = None
+        self._battle_state_key = None
+        self._caught_counter = bitfield.BitfieldCounter(POKEDEX_SEEN - POKEDEX_OWNED)
+        self._seen_counter = bitfield.BitfieldCounter(POKEDEX_END - POKEDEX_SEEN)
+
+        # Event flags that flipped during the last step, see _update_event_flags
+        self.event_flags = EventFlagTracker()
+        self._event_flags_key = None
+
+        self._walkable_tiles_cache: dict[tuple[int, int], np.ndarray] = {}
+
+        # Actions in [0, 1) are split into one equal bin per button, computed once
+        self._action_bins = np.linspace(0, 1, len(valid_actions) + 1)
+        self._action_bin_edges = self._action_bins.tolist()
+
+        # Adaptive mode keeps ticking after act_freq until the game takes input again
+        self.adaptive_frame_skip = adaptive_frame_skip
+        self.max_action_frames = (
+            8 * act_freq if max_action_frames is None else max_action_frames
+        )
+        self.last_action_frames = 0
+
+        # Go-Explore archive of states per location, see enable_state_archive
+        self.state_archive: StateArchive | None = None
+        self.archive_features: tuple[str, ...] = ()
+        self.archive_reset_probability = 0.0
+        self.archive_cell: tuple | None = None
+        # Steps the restored archive cell took to reach, 0 when starting from the start state
+        self.archive_start_steps = 0
+        self._archive_rng = random.Random()
+
         super().__init__(
             task=task,
             rom_name="PokemonRed.gb",
@@ -31,6 +128,7 @@ class PokemonEnvironment(PyboyEnvironment):
             valid_actions=valid_actions,
             release_button=release_button,
             headless=headless,
+            telemetry_sink=telemetry_sink,
         )
 
     @cached_property
@@ -61,46 +159,216 @@ class PokemonEnvironment(PyboyEnvironment):
         )
 
     def _run_action_on_emulator(self, action_array: np.ndarray) -> None:
-        if isinstance(action_array, torch.Tensor):
+        # Only a loaded torch can have produced a tensor, avoids importing it here
+        torch = sys.modules.get("torch")
+        if torch is not None and isinstance(action_array, torch.Tensor):
             action = action_array.item()
-        elif isinstance(action_array, int):
-            action = action_array
+        elif isinstance(action_array, (int, np.integer)):
+            # Already a button index, e.g. from decode_actions or a discrete policy
+            self._press_button(int(action_array))
+            return
+        elif isinstance(action_array, float):
+            action = min(action_array, 0.99) # from sample_action
         else:
             action = action_array[0] # if action is an array
             action = min(action, 0.99)
 
         # Continuous Action is a float between 0 - 1 from Value based methods
         # We need to convert this to an action that the emulator can understand
-        bins = np.linspace(0, 1, len(self.valid_actions) + 1)
-        button = np.digitize(action, bins) - 1
+        # bisect_right over the bin edges matches np.digitize
+        button = bisect.bisect_right(self._action_bin_edges, action) - 1
+        self._press_button(button)
 
+    def decode_actions(self, actions: np.ndarray) -> np.ndarray:
+        # Button index per row of an (N, action_num) batch, same bins as single actions
+        actions = np.asarray(actions, dtype=np.float64).reshape(len(actions), -1)
+        return (
+            np.searchsorted(
+                self._action_bins, np.minimum(actions[:, 0], 0.99), side="right"
+            )
+            - 1
+        )
+
+    def _press_button(self, button: int) -> None:
         # Push the button for a few frames
-        self.pyboy.send_input(self.valid_actions[button])
+        self._send_input(self.valid_actions[button])
 
-        for _ in range(self.act_freq):
-            self.pyboy.tick()
+        self._tick(self.act_freq)
 
         # Release the button
-        self.pyboy.send_input(self.release_button[button])
+        self._send_input(self.release_button[button])
 
-    def _generate_game_stats(self) -> dict[str, any]:
-        return {
-            "location": self._get_location(),
-            "party_size": self._get_party_size(),
-            "ids": self._read_party_id(),
-            "pokemon": [pkc.get_pokemon(id) for id in self._read_party_id()],
-            "levels": self._read_party_level(),
-            "type_id": self._read_party_type(),
-            "type": [pkc.get_type(id) for id in self._read_party_type()],
-            "hp": self._read_party_hp(),
-            "xp": self._read_party_xp(),
-            "status": self._read_party_status(),
-            "badges": self._get_badge_count(),
-            "caught_pokemon": self._read_caught_pokemon_count(),
-            "seen_pokemon": self._read_seen_pokemon_count(),
-            "money": self._read_money(),
-            "events": self._read_events(),
+        self.last_action_frames = self.act_freq
+        if self.adaptive_frame_skip:
+            self._tick_until_ready()
+
+    def _ready_for_input(self) -> bool:
+        # Read directly, a WRAM snapshot per polled frame would cost more than these four bytes
+        memory = self.pyboy.memory
+        return (
+            memory[WALK_COUNTER] == 0
+            and memory[JOY_IGNORE] == 0
+            and memory[STATUS_FLAGS] & STATUS_FLAGS_BUSY == 0
+            and memory[MOVEMENT_FLAGS] & MOVEMENT_FLAGS_BUSY == 0
+        )
+
+    def _tick_until_ready(self) -> None:
+        # Finish walks, scripted text and warps inside this action, capped at max_action_frames
+        while (
+            self.last_action_frames < self.max_action_frames
+            and not self._ready_for_input()
+        ):
+            self._tick(1)
+            self.last_action_frames += 1
+
+    def enable_state_archive(
+        self,
+        memory_budget: int = 256 * 1024 * 1024,
+        features: tuple[str, ...] = (),
+        reset_probability: float = 0.5,
+        seed: int | None = None,
+    ) -> StateArchive:
+        # Cells are (map_id, x, y) plus the given game stats, e.g. ("badges", "party_size")
+        unsupported = [
+            feature
+            for feature in features
+            if feature not in ARCHIVE_SCALAR_FEATURES
+            and feature not in ARCHIVE_SUMMED_FEATURES
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Unsupported archive features {unsupported}, choose from "
+                f"{sorted(ARCHIVE_SCALAR_FEATURES | ARCHIVE_SUMMED_FEATURES)}"
+            )
+
+        self.state_archive = StateArchive(memory_budget)
+        self.archive_features = tuple(features)
+        self.archive_reset_probability = reset_probability
+        self._archive_rng = random.Random(seed)
+        return self.state_archive
+
+    def _archive_key(self, game_stats: dict) -> tuple:
+        location = game_stats["location"]
+        key = (location["map_id"], location["x"], location["y"])
+        for feature in self.archive_features:
+            value = game_stats[feature]
+            key += (value if feature in ARCHIVE_SCALAR_FEATURES else sum(value),)
+        return key
+
+    def _archive_total_steps(self) -> int:
+        # Steps from the task's start state, self.steps alone restarts on an archive restore
+        return self.archive_start_steps + self.steps
+
+    def _archive_score(self, game_stats: dict) -> tuple:
+        # Prefer the state with the most progress, then the one reached in fewer steps
+        return (
+            game_stats["badges"],
+            game_stats["caught_pokemon"],
+            game_stats["seen_pokemon"],
+            sum(game_stats["levels"]),
+            -self._archive_total_steps(),
+        )
+
+    def _after_step(self, game_stats: dict, done: bool, truncated: bool) -> None:
+        # Keeps the tracker one step behind even when no reward asked for the flags
+        self._update_event_flags()
+
+        if self.state_archive is None:
+            return
+
+        key = self._archive_key(game_stats)
+        score = self._archive_score(game_stats)
+        if self.state_archive.wants(key, score):
+            self.state_archive.add(
+                key, self.save_state_bytes(), score, self._archive_total_steps()
+            )
+        else:
+            self.state_archive.visit(key)
+
+    def _restore_start_state(self) -> None:
+        self.archive_cell = None
+        self.archive_start_steps = 0
+        if (
+            self.state_archive
+            and self._archive_rng.random() < self.archive_reset_probability
+        ):
+            self.archive_cell, state = self.state_archive.sample(self._archive_rng)
+            self.archive_start_steps = self.state_archive.cells[self.archive_cell].steps
+            self.load_state_bytes(state)
+        else:
+            super()._restore_start_state()
+
+        # Flags already set in the start state are not news
+        self.event_flags.reset(self._read_range(EVENT_FLAGS_START, EVENT_FLAGS_END))
+        self._event_flags_key = self._frame_key()
+
+    def _update_event_flags(self) -> list[int]:
+        # Flags set by the last step, diffed once per step and memoized by frame
+        key = self._frame_key()
+        if self._event_flags_key != key:
+            self.event_flags.update(
+                self._read_range(EVENT_FLAGS_START, EVENT_FLAGS_END)
+            )
+            self._event_flags_key = key
+        return self.event_flags.set_flags
+
+    def _generate_game_stats(self) -> GameStats:
+        # One lazily decoded stats object per emulator frame
+        key = self._frame_key()
+        if self._game_stats_key == key:
+            return self._game_stats
+
+        # Fields are pinned to this frame's WRAM so they stay correct when read after later ticks
+        wram = self._wram_snapshot()
+        readers = {
+            "location": self._get_location,
+            "party_size": self._get_party_size,
+            "ids": self._read_party_id,
+            "pokemon": self._read_party_names,
+            "levels": self._read_party_level,
+            "type_id": self._read_party_type,
+            "type": self._read_party_type_names,
+            "hp": self._read_party_hp,
+            "xp": self._read_party_xp,
+            "status": self._read_party_status,
+            "badges": self._get_badge_count,
+            "caught_pokemon": self._read_caught_pokemon_count,
+            "seen_pokemon": self._read_seen_pokemon_count,
+            "money": self._read_money,
+            "events": self._read_events,
         }
+        self._game_stats = GameStats(
+            {
+                name: partial(self._read_pinned, wram, reader)
+                for name, reader in readers.items()
+            }
+        )
+        self._game_stats_key = key
+        return self._game_stats
+
+    def _read_battle_state(self) -> BattleState:
+        # Both active mons and the battle flags in one read, decoded once per frame
+        key = self._frame_key()
+        if self._battle_state_key == key:
+            return self._battle_state
+
+        block = self._read_range(layout.ENEMY_MON, layout.BATTLE_BLOCK_END)
+        enemy = layout.decode_battle_mon(block, 0)
+        player = layout.decode_battle_mon(block, layout.BATTLE_MON - layout.ENEMY_MON)
+        self._battle_state = BattleState(
+            kind=int(block[layout.IS_IN_BATTLE - layout.ENEMY_MON]),
+            battle_type=int(block[layout.BATTLE_TYPE - layout.ENEMY_MON]),
+            enemy_species=int(enemy["species"]),
+            enemy_level=int(enemy["level"]),
+            enemy_hp=int(enemy["hp"]),
+            enemy_max_hp=int(enemy["max_hp"]),
+            player_species=int(player["species"]),
+            player_level=int(player["level"]),
+            player_hp=int(player["hp"]),
+            player_max_hp=int(player["max_hp"]),
+        )
+        self._battle_state_key = key
+        return self._battle_state
 
     @abstractmethod
     def _calculate_reward(self, new_state: dict) -> float:
@@ -128,7 +396,7 @@ class PokemonEnvironment(PyboyEnvironment):
         }
 
     def _get_party_size(self) -> int:
-        return self._read_m(0xD163)
+        return self._read_m(layout.PARTY_COUNT)
 
     def _get_badge_count(self) -> int:
         return self._bit_count(self._read_m(0xD356))
@@ -144,75 +412,59 @@ class PokemonEnvironment(PyboyEnvironment):
             return 1
         return 0
 
+    def _read_party(self) -> np.ndarray:
+        # All six party records in one structured view, see memory_layout.PARTY_MON_DTYPE
+        return layout.decode_party(
+            self._read_range(
+                layout.PARTY_MONS,
+                layout.PARTY_MONS + layout.PARTY_LENGTH * layout.PARTY_MON_SIZE,
+            )
+        )
+
+    def _read_party_observation(self) -> np.ndarray:
+        # (6, 12) float32 of the party's stats, empty slots are zero
+        return layout.party_observation(self._read_party(), self._get_party_size())
+
     def _read_party_id(self) -> list[int]:
         # https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/constants/pokemon_constants.asm
-        return [
-            self._read_m(addr)
-            for addr in [0xD164, 0xD165, 0xD166, 0xD167, 0xD168, 0xD169]
-        ]
+        return self._read_range(
+            layout.PARTY_SPECIES, layout.PARTY_SPECIES + layout.PARTY_LENGTH
+        ).tolist()
+
+    def _read_party_names(self) -> list[str]:
+        return [pkc.get_pokemon(id) for id in self._read_party_id()]
+
+    def _read_party_type_names(self) -> list[str]:
+        return [pkc.get_type(id) for id in self._read_party_type()]
 
     def _read_party_type(self) -> list[int]:
         # https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/constants/type_constants.asm
-        return [
-            self._read_m(addr)
-            for addr in [
-                0xD170,
-                0xD171,
-                0xD19C,
-                0xD19D,
-                0xD1C8,
-                0xD1C9,
-                0xD1F4,
-                0xD1F5,
-                0xD220,
-                0xD221,
-                0xD24C,
-                0xD24D,
-            ]
-        ]
+        return self._read_party()["types"].ravel().tolist()
 
     def _read_party_level(self) -> list[int]:
-        return [
-            self._read_m(addr)
-            for addr in [0xD18C, 0xD1B8, 0xD1E4, 0xD210, 0xD23C, 0xD268]
-        ]
+        return self._read_party()["level"].tolist()
 
     def _read_party_status(self) -> list[int]:
         # https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/constants/status_constants.asm
-        return [
-            self._read_m(addr)
-            for addr in [0xD16F, 0xD19B, 0xD1C7, 0xD1F3, 0xD21F, 0xD24B]
-        ]
+        return self._read_party()["status"].tolist()
 
     def _read_party_hp(self) -> dict[str, list[int]]:
-        hp = [
-            self._read_hp(addr)
-            for addr in [0xD16C, 0xD198, 0xD1C4, 0xD1F0, 0xD21C, 0xD248]
-        ]
-        max_hp = [
-            self._read_hp(addr)
-            for addr in [0xD18D, 0xD1B9, 0xD1E5, 0xD211, 0xD23D, 0xD269]
-        ]
-        return {"current": hp, "max": max_hp}
+        party = self._read_party()
+        return {"current": party["hp"].tolist(), "max": party["max_hp"].tolist()}
 
     def _read_party_xp(self) -> list[int]:
-        return [
-            self._read_triple(addr)
-            for addr in [0xD179, 0xD1A5, 0xD1D1, 0xD1FD, 0xD229, 0xD255]
-        ]
+        return layout.party_exp(self._read_party()).tolist()
 
     def _read_hp(self, start: int) -> int:
         return 256 * self._read_m(start) + self._read_m(start + 1)
 
     def _read_caught_pokemon_count(self) -> int:
-        return sum(
-            list(self._bit_count(self._read_m(i)) for i in range(0xD2F7, 0xD30A))
+        return self._caught_counter.update(
+            self._read_range(POKEDEX_OWNED, POKEDEX_SEEN)
         )
 
     def _read_seen_pokemon_count(self) -> int:
-        return sum(
-            list(self._bit_count(self._read_m(i)) for i in range(0xD30A, 0xD31D))
-        )
+        return self._seen_counter.update(self._read_range(POKEDEX_SEEN, POKEDEX_END))
 
     def _read_money(self) -> int:
         return (
@@ -222,58 +474,71 @@ class PokemonEnvironment(PyboyEnvironment):
         )
 
     def _read_events(self) -> list[int]:
-        event_flags_start = 0xD747
-        event_flags_end = 0xD886
         # museum_ticket = (0xD754, 0)
         # base_event_flags = 13
-        return [
-            self._bit_count(self._read_m(i))
-            for i in range(event_flags_start, event_flags_end)
-        ]
+        return bitfield.popcount(
+            self._read_range(EVENT_FLAGS_START, EVENT_FLAGS_END)
+        ).tolist()
 
-    def _get_screen_background_tilemap(self):
+    def _get_screen_background_tilemap(
+        self, rows: slice = slice(0, 18), columns: slice = slice(0, 20)
+    ):
         ### SIMILAR TO CURRENT pyboy.game_wrapper()._game_area_np(), BUT ONLY FOR BACKGROUND TILEMAP, SO NPC ARE SKIPPED
-        bsm = self.pyboy.botsupport_manager()
-        ((scx, scy), (wx, wy)) = bsm.screen().tilemap_position()
-        tilemap = np.array(bsm.tilemap_background()[:, :])
-        return np.roll(np.roll(tilemap, -scy // 8, axis=0), -scx // 8, axis=1)[:18, :20]
+        memory = self.pyboy.memory
+        lcdc = memory[LCDC]
+        start = BG_MAP_HIGH if lcdc & 0b1000 else BG_MAP_LOW
+
+        # The 32x32 map wraps around, only the visible rows are read
+        row_index = (memory[SCY] // 8 + np.arange(18)[rows]) % 32
+        column_index = (memory[SCX] // 8 + np.arange(20)[columns]) % 32
+        map_rows = b"".join(
+            bytes(memory[start + 32 * row : start + 32 * (row + 1)])
+            for row in row_index.tolist()
+        )
+        tiles = np.frombuffer(map_rows, dtype=np.uint8).reshape(-1, 32)
+        tiles = tiles[:, column_index].astype(np.uint16)
+
+        # In signed addressing ids 0x00-0x7F refer to tiles 0x100-0x17F
+        if not lcdc & 0b10000:
+            tiles[tiles < 0x80] += 0x100
+        return tiles
+
+    def _walkable_tiles(self) -> np.ndarray:
+        # Lookup table over tile ids, cached per tileset's collision list
+        collision_ptr = self.pyboy.memory[0xD530] + (self.pyboy.memory[0xD531] << 8)
+        grass_tile_index = 0xFF
+        if self.pyboy.memory[0xFFD7] > 0:  # tileset type
+            grass_tile_index = self._read_m(0xD535)
+
+        key = (collision_ptr, grass_tile_index)
+        walkable = self._walkable_tiles_cache.get(key)
+        if walkable is None:
+            walkable = np.zeros(0x200, dtype=bool)
+            if grass_tile_index != 0xFF:
+                walkable[grass_tile_index + 0x100] = True
+            # The collision list is at most 0x180 ids, terminated by 0xFF
+            collision = np.array(
+                self.pyboy.memory[collision_ptr : collision_ptr + 0x180],
+                dtype=np.uint16,
+            )
+            end = np.flatnonzero(collision == 0xFF)
+            if end.size:
+                collision = collision[: end[0]]
+            walkable[collision + 0x100] = True
+            self._walkable_tiles_cache[key] = walkable
+        return walkable
 
     def _get_screen_walkable_matrix(self):
-        walkable_tiles_indexes = []
-        collision_ptr = self.pyboy.get_memory_value(0xD530) + (
-            self.pyboy.get_memory_value(0xD531) << 8
+        # Bottom left tile of each 2x2 block decides if the block can be walked on
+        screen_tiles = self._get_screen_background_tilemap(
+            slice(1, 18, 2), slice(0, 20, 2)
         )
-        tileset_type = self.pyboy.get_memory_value(0xFFD7)
-        if tileset_type > 0:
-            grass_tile_index = self.pyboy.get_memory_value(0xD535)
-            if grass_tile_index != 0xFF:
-                walkable_tiles_indexes.append(grass_tile_index + 0x100)
-        for i in range(0x180):
-            tile_index = self.pyboy.get_memory_value(collision_ptr + i)
-            if tile_index == 0xFF:
-                break
-            else:
-                walkable_tiles_indexes.append(tile_index + 0x100)
-        screen_tiles = self._get_screen_background_tilemap()
-        bottom_left_screen_tiles = screen_tiles[1 : 1 + screen_tiles.shape[0] : 2, ::2]
-        walkable_matrix = np.isin(
-            bottom_left_screen_tiles, walkable_tiles_indexes
-        ).astype(np.uint8)
-        return walkable_matrix
+        return self._walkable_tiles()[screen_tiles].astype(np.uint8)
 
     def game_area_collision(self):
-        shape = (20, 18)
-        game_area_section = (0, 0) + shape
-        width = game_area_section[2]
-        height = game_area_section[3]
-
-        game_area = np.ndarray(shape=(height, width), dtype=np.uint32)
-        _collision = self._get_screen_walkable_matrix()
-        for i in range(height // 2):
-            for j in range(width // 2):
-                game_area[i * 2][j * 2 : j * 2 + 2] = _collision[i][j]
-                game_area[i * 2 + 1][j * 2 : j * 2 + 2] = _collision[i][j]
-        return game_area
+        # 18x20 tile grid, each walkable block covers 2x2 tiles
+        walkable = self._get_screen_walkable_matrix().astype(np.uint32)
+        return walkable.repeat(2, axis=0).repeat(2, axis=1)
 
     # Note: These are all examples of rewards we can calculate based on the stats, you can implement and modify your own as you please
 
@@ -301,4 +566,7 @@ class PokemonEnvironment(PyboyEnvironment):
         return new_state["money"] - self.prior_game_stats["money"]
 
     def _event_reward(self, new_state: dict[str, any]) -> int:
-        return sum(new_state["events"]) - sum(self.prior_game_stats["events"])
+        # Flags flipped this step rather than re-summing every event byte, new_state is the
+        # current frame the tracker diffs
+        self._update_event_flags()
+        return len(self.event_flags.set_flags) - len(self.event_flags.cleared_flags)
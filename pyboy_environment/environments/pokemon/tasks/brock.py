@@ -1,19 +1,48 @@
+import os
 from functools import cached_property
 import numpy as np
 from pyboy.utils import WindowEvent
+from pyboy_environment.environments.checkpoint import BackgroundWriter, load_arrays, save_arrays
 from pyboy_environment.environments.pokemon.pokemon_environment import PokemonEnvironment
 from pyboy_environment.environments.pokemon import pokemon_constants as pkc
+from pyboy_environment.environments.pokemon.screens import ScreenClassifier
+from pyboy_environment.environments.pokemon.visitation import VisitationIndex
 
 class PokemonBrock(PokemonEnvironment):
+    # Observation and reward come from WRAM and the tile maps, never the screen
+    needs_pixels = False
+
+    # Episode state restored with the emulator. The visit counts are cross-episode memory
+    # with their own checkpoints, see enable_checkpoints
+    snapshot_fields = PokemonEnvironment.snapshot_fields + (
+        "discovered_maps",
+        "discovered_maps_episode",
+        "start_location",
+        "previous_locations",
+        "max_dist_episode",
+        "max_dist",
+        "prev_distance",
+        "current_location",
+        "current_state",
+        "prev_state",
+        "found_map",
+        "seen_pokemon_episode",
+        "seen_pokemon",
+        "in_battle",
+        "in_fight",
+        "first_hp_read",
+        "first_enemy_hp_read",
+    )
+
     def __init__(
         self,
         act_freq: int,
         emulation_speed: int = 0,
         headless: bool = False,
+        telemetry_sink=None,
     ) -> None:
         # Initialize the set to track discovered locations
-        self.discovered_locations = set()
-        self.discovered_locations_episode = set()
+        self.visits = VisitationIndex()
         self.discovered_maps = set()
         self.discovered_maps_episode = set()
         self.start_location = [None] * 248  # Track the start location of each map/ room
@@ -32,6 +61,13 @@ class PokemonBrock(PokemonEnvironment):
         self.next_tick_pause = False # for video recording purposes 
         self.first_hp_read = False
         self.first_enemy_hp_read = False
+        self.screens = ScreenClassifier()
+
+        # Periodic snapshots of the cross-episode memory, see enable_checkpoints
+        self.checkpoint_path = None
+        self.checkpoint_interval = 0
+        self._checkpoint_countdown = 0
+        self._checkpoint_writer = BackgroundWriter()
 
         valid_actions: list[WindowEvent] = [
             WindowEvent.PRESS_ARROW_DOWN,
@@ -61,6 +97,7 @@ class PokemonBrock(PokemonEnvironment):
             valid_actions=valid_actions,
             release_button=release_button,
             headless=headless,
+            telemetry_sink=telemetry_sink,
         )
 
     def _get_state(self) -> np.ndarray:
@@ -89,8 +126,9 @@ class PokemonBrock(PokemonEnvironment):
             distance = 0.0  # Default to 0 if there's no start location
 
         if self.in_battle:
-            hp = self.categorize_hp(self._read_m(0xD015)) # split this into four states to reduce state space
-            enemy_hp = self.categorize_hp(self._read_m(0xCFE7)) # split this into four states to reduce state space
+            battle = self._read_battle_state()
+            hp = self.categorize_hp(battle.player_hp, battle.player_max_hp) # split this into four states to reduce state space
+            enemy_hp = self.categorize_hp(battle.enemy_hp, battle.enemy_max_hp) # split this into four states to reduce state space
             state_array = [
                 hp,
                 enemy_hp,
@@ -108,8 +146,7 @@ class PokemonBrock(PokemonEnvironment):
         # Get the current location and turn into a tuple
         map_loc = self.current_location["map_id"]
         location_tuple = (self.current_location["x"], self.current_location["y"], self.current_location["map"], self.current_location["map_id"])
-        frame = PokemonEnvironment.grab_frame(self)
-        game_area = PokemonEnvironment.game_area(self)
+        battle = self._read_battle_state()
 
         reward = 0.0  # Initialize reward as 0
         distance = 0
@@ -120,20 +157,19 @@ class PokemonBrock(PokemonEnvironment):
             current_x, current_y = self.current_location["x"], self.current_location["y"]
             distance = np.sqrt((current_x - start_x) ** 2 + (current_y - start_y) ** 2)
         
-        if self.previous_locations:
-            if self.current_location != self.previous_locations[0]:
-                if self.in_battle:
-                    print("exiting battle")
-                    self.in_battle = False
+        if self.in_battle and not battle.in_battle:
+            self.telemetry.event("battle_exit", "exiting battle")
+            self.in_battle = False
 
         reward += self.check_location_rewards(map_loc, location_tuple, distance)
         # Penalize swapping between the same two maps
         reward += self.check_map_swap(map_loc)
 
         # Calculate Pokemon related rewards
-        reward += self.check_pokemon_rewards(frame)
+        reward += self.check_pokemon_rewards(battle)
 
         if self.in_battle:
+            game_area = PokemonEnvironment.game_area(self)
             reward += self.battle_rewards(game_area)
             
         # ========== XP Rewards ==========
@@ -158,12 +194,66 @@ class PokemonBrock(PokemonEnvironment):
             return True
         return False
     
+    def _after_step(self, game_stats: dict, done: bool, truncated: bool) -> None:
+        super()._after_step(game_stats, done, truncated)
+        if self.checkpoint_path is not None:
+            self._checkpoint_countdown -= 1
+            if self._checkpoint_countdown <= 0:
+                self._checkpoint_countdown = self.checkpoint_interval
+                self._checkpoint_writer.submit(self.checkpoint_path, self.exploration_state())
+
+    def enable_checkpoints(self, path: str, interval: int = 10000, resume: bool = True) -> None:
+        # Saves the cross-episode memory every `interval` steps on a background thread
+        if resume and os.path.exists(path):
+            self.load_exploration(path)
+        self.checkpoint_path = path
+        self.checkpoint_interval = interval
+        self._checkpoint_countdown = interval
+
+    def exploration_state(self) -> dict[str, np.ndarray]:
+        # Copies of everything learnt across episodes, safe to write from another thread
+        visit_maps, visit_counts = self.visits.snapshot()
+        start_location = np.full((len(self.start_location), 2), -1, dtype=np.int16)
+        for map_id, location in enumerate(self.start_location):
+            if location is not None:
+                start_location[map_id] = location
+        return {
+            "discovered_maps": np.array(sorted(self.discovered_maps), dtype=str),
+            "visit_maps": visit_maps,
+            "visit_counts": visit_counts,
+            "max_dist": self.max_dist.copy(),
+            "start_location": start_location,
+            "seen_pokemon": np.array(self.seen_pokemon, dtype=np.int64),
+        }
+
+    def merge_exploration_state(self, state: dict[str, np.ndarray]) -> None:
+        # Union of discoveries, keeps the furthest distances and the first known start locations
+        self.discovered_maps.update(state["discovered_maps"].tolist())
+        self.visits.merge(state["visit_maps"], state["visit_counts"])
+        np.maximum(self.max_dist, state["max_dist"], out=self.max_dist)
+        for map_id, (x, y) in enumerate(state["start_location"].tolist()):
+            if self.start_location[map_id] is None and x >= 0:
+                self.start_location[map_id] = (x, y)
+        self.seen_pokemon = max(self.seen_pokemon, int(state["seen_pokemon"]))
+
+    def save_exploration(self, path: str) -> None:
+        self._checkpoint_writer.wait()
+        save_arrays(path, self.exploration_state())
+
+    def load_exploration(self, *paths: str) -> None:
+        # Several workers' checkpoints can be merged into this one
+        for path in paths:
+            self.merge_exploration_state(load_arrays(path))
+
     def reset_episode(self):
-        print("resetting episode")
-        self.discovered_locations_episode.clear()
+        self.visits.new_episode()
         self.discovered_maps_episode.clear()
         self.seen_pokemon_episode = 0
-        print(f"max distance: {self.max_dist[self.current_location['map_id']]}")
+        self.telemetry.event(
+            "episode_reset",
+            "resetting episode, max distance: %s",
+            self.max_dist[self.current_location["map_id"]],
+        )
         self.max_dist_episode = np.zeros(248) # reset all max distances this episode 
 
     def check_location_rewards(self, map_loc, location_tuple, distance):
@@ -185,25 +275,26 @@ class PokemonBrock(PokemonEnvironment):
 
                 # First discovery of this map across all episodes
                 if self.current_location["map"] not in self.discovered_maps:
-                    print(f"============ {self.current_location['map']} discovered FOR THE FIRST TIME ============")
+                    self.telemetry.event("map_discovered", "%s discovered FOR THE FIRST TIME", self.current_location["map"])
                     self.discovered_maps.add(self.current_location["map"])
                     reward += 300.0 ** len(self.discovered_maps)
 
                 # Update start location for the new map
                 self.start_location[map_loc] = (self.current_location["x"], self.current_location["y"])
                 self.max_dist_episode[map_loc] = 0
-                print(f"New start location set for map {map_loc}: {self.start_location[map_loc]}")
+                self.telemetry.event("start_location", "New start location set for map %s: %s", map_loc, self.start_location[map_loc])
 
         # Handle location discovery within the map
-        if location_tuple not in self.discovered_locations_episode:
-            self.discovered_locations_episode.add(location_tuple)
+        new_episode_location, new_location = self.visits.visit(
+            map_loc, self.current_location["x"], self.current_location["y"]
+        )
+        if new_episode_location:
             distance_bonus = distance * 0.1  # Add a bonus based on distance
             reward += 10.0 + distance_bonus  # Reward for finding a new location with distance bonus
 
-        if location_tuple not in self.discovered_locations:
+        if new_location:
             distance_bonus = distance * 0.2  # Larger bonus for all-time discoveries
             reward += 50.0 + distance_bonus  # Reward for finding a new location never seen in any episode
-            self.discovered_locations.add(location_tuple)
             if distance > self.max_dist[map_loc]:
                 self.max_dist[map_loc] = distance # set distance as max dist
                 reward += 50.0
@@ -226,27 +317,29 @@ class PokemonBrock(PokemonEnvironment):
             third_map = self.previous_locations[2][3]  # Get map_id from the previous step
             if first_map == third_map and first_map != second_map:
                 reward -= 100.0  # Penalize for swapping maps back and forth
-                print("Swapping between the same two maps detected")
+                self.telemetry.event("map_swap", "Swapping between the same two maps detected")
         return reward
     
-    def check_pokemon_rewards(self, frame):
+    def check_pokemon_rewards(self, battle):
         reward = 0
         # Ensure prev_state is available for comparison
         if self.prev_state:
-            if self._is_grass_tile():
-                if np.all(frame == 0):
-                    print("========= starting pokemon battle =========")
-                    reward += 1000
-                    self.in_battle = True
+            if battle.in_battle and not self.in_battle:
+                self.telemetry.event("battle_start", "starting pokemon battle")
+                reward += 1000
+                self.in_battle = True
             # Found new Pokémon in the current state- counts unique pokemon
             if self.current_state["seen_pokemon"] > self.prev_state["seen_pokemon"]:
-                print(f"currrent state seen: {self.current_state['seen_pokemon']}")
-                print(f"previous state seen: {self.prev_state['seen_pokemon']}")
-                print(f"episode seen: {self.seen_pokemon_episode}")
-                print(f"max seen: {self.seen_pokemon}")
+                self.telemetry.event(
+                    "pokemon_seen",
+                    "Found new Pokémon - current state seen: %s, previous state seen: %s, episode seen: %s, max seen: %s",
+                    self.current_state["seen_pokemon"],
+                    self.prev_state["seen_pokemon"],
+                    self.seen_pokemon_episode,
+                    self.seen_pokemon,
+                )
 
                 reward += 1000.0
-                print("============== Found new Pokémon ==============")
                 
                 # Update the number of Pokémon seen in the current episode
                 self.seen_pokemon_episode = self.current_state["seen_pokemon"]
@@ -255,7 +348,7 @@ class PokemonBrock(PokemonEnvironment):
                 if self.seen_pokemon_episode > self.seen_pokemon:
                     reward += 1000.0
                     self.seen_pokemon = self.seen_pokemon_episode
-                    print("============== Max new Pokémon, giving reward ==============")
+                    self.telemetry.event("pokemon_seen_record", "Max new Pokémon, giving reward")
         
         # Ensure that `seen_pokemon_episode` is always updated correctly for future comparisons
         self.seen_pokemon_episode = max(self.seen_pokemon_episode, self.current_state["seen_pokemon"])
@@ -264,96 +357,42 @@ class PokemonBrock(PokemonEnvironment):
 
     def battle_rewards(self, game_area):
         reward = 0
-        fight_menu = np.array([
-    [383, 311, 318, 325, 332, 339, 346, 353, 383, 367, 374, 374, 374, 374, 374, 374, 374, 374, 375, 383],
-    [377, 378, 378, 378, 378, 378, 378, 378, 377, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 379],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 237, 133, 136, 134, 135, 147, 383, 225, 226, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 136, 147, 132, 140, 383, 383, 145, 148, 141, 380],
-    [381, 378, 378, 378, 378, 378, 378, 378, 381, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 382]
-])
-        fight_state = np.array([
-    [380, 383, 383, 383, 383, 249, 251, 243, 249, 251, 380, 374, 374, 374, 374, 374, 374, 374, 375, 383],
-    [381, 378, 378, 378, 378, 378, 378, 378, 378, 378, 382, 378, 378, 378, 378, 378, 378, 378, 378, 379],
-    [380, 383, 383, 383, 380, 237, 147, 128, 130, 138, 139, 132, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 380, 383, 147, 128, 136, 139, 383, 150, 135, 136, 143, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 380, 383, 227, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 380, 383, 227, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [381, 378, 378, 378, 381, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 382]
-])
-        flee_state = np.array([
-    [383, 311, 318, 325, 332, 339, 346, 353, 383, 367, 374, 374, 374, 374, 374, 374, 374, 374, 375, 383],
-    [377, 378, 378, 378, 378, 378, 378, 378, 377, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 379],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 133, 136, 134, 135, 147, 383, 225, 226, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 136, 147, 132, 140, 383, 237, 145, 148, 141, 380],
-    [381, 378, 378, 378, 378, 378, 378, 378, 381, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 382]
-])      
-        tackle_state = np.array([
-    [383, 311, 318, 325, 332, 339, 346, 353, 383, 367, 374, 374, 374, 374, 374, 374, 374, 374, 375, 383],
-    [377, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 379],
-    [380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 128, 128, 128, 128, 128, 128, 128, 128, 128, 128, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 180, 178, 164, 163, 383, 147, 128, 130, 138, 139, 132, 231, 383, 383, 383, 383, 383, 383, 380],
-    [381, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 382]
-])
-        item_menu = np.array([
-    [383, 311, 318, 325, 332, 339, 346, 353, 383, 367, 374, 374, 374, 374, 374, 374, 374, 374, 375, 383],
-    [377, 378, 378, 378, 378, 378, 378, 378, 377, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 379],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 133, 136, 134, 135, 147, 383, 225, 226, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 237, 136, 147, 132, 140, 383, 383, 145, 148, 141, 380],
-    [381, 378, 378, 378, 378, 378, 378, 378, 381, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 382]
-])
-        pokemon_select = np.array([
-    [383, 311, 318, 325, 332, 339, 346, 353, 383, 367, 374, 374, 374, 374, 374, 374, 374, 374, 375, 383],
-    [377, 378, 378, 378, 378, 378, 378, 378, 377, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 379],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 133, 136, 134, 135, 147, 237, 225, 226, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 383, 383, 383, 383, 383, 383, 383, 383, 383, 380],
-    [380, 383, 383, 383, 383, 383, 383, 383, 380, 383, 136, 147, 132, 140, 383, 383, 145, 148, 141, 380],
-    [381, 378, 378, 378, 378, 378, 378, 378, 381, 378, 378, 378, 378, 378, 378, 378, 378, 378, 378, 382]
-])
-        
+        screen = self.screens.classify(game_area)
+
         # input("pause")
         # print(game_area[-7:, :])
 
-        # if np.array_equal(game_area[-7:, :], fight_menu):
+        # if screen == "fight_menu":
         #     print("on fight menu")
         #     # self.in_fight = True
         #     reward += 100.0
             
-        # elif np.array_equal(game_area[-7:, :], fight_state):
+        # elif screen == "attack_menu":
         #     print("on attack menu")
         #     reward += 200.0
 
-        if np.array_equal(game_area[-7:, :], tackle_state):
-            print("tackle action")
+        if screen == "tackle":
+            self.telemetry.event("battle_tackle", "tackle action")
             reward += 300.0
 
         # if enemy_hp1 > enemy_hp:
         #     reward += 1000.0
             
-        elif np.array_equal(game_area[-7:, :], flee_state):
-            print("on flee menu")
+        elif screen == "flee_menu":
+            self.telemetry.event("battle_flee_menu", "on flee menu")
             reward -= 100.0
 
-        # elif np.array_equal(game_area[-7:, :], item_menu):
+        # elif screen == "item_menu":
         #     print("on item menu")
         #     reward -= 100.0
 
-        # elif np.array_equal(game_area[-7:, :], pokemon_select):
+        # elif screen == "pokemon_select":
         #     print("on pokemon select menu")
         #     reward -= 100.0
 
         return reward
     
-    def categorize_hp(self, hp_value: int) -> int:
-        max_hp = 20
+    def categorize_hp(self, hp_value: int, max_hp: int = 20) -> int:
         # Divide HP into four discrete states based on max_hp
         if hp_value <= max_hp * 0.25:  # 0-25% of max_hp
             return 0  # Low health
@@ -371,7 +410,7 @@ class PokemonBrock(PokemonEnvironment):
             current_xp = self.current_state['xp']
 
             if current_xp > prev_xp:
-                print("========== Gained XP! ==========")
+                self.telemetry.event("xp_gained", "Gained XP!")
                 reward += 10000            
         return reward;
 
@@ -0,0 +1,113 @@
+import numpy as np
+
+MAP_COUNT = 248
+MAP_SIZE = 256  # x and y are single bytes
+
+
+class VisitationIndex:
+    """
+    Visit counts per (map, y, x) with a separate record of the current episode's visits.
+
+    Each map gets two MAP_SIZE x MAP_SIZE uint8 arrays the first time it is visited: counts
+    that saturate at 255 and the generation of the last episode that visited a tile.
+    Starting an episode only bumps the generation, the arrays are cleared once every 255
+    episodes when it wraps. At most MAP_COUNT * 2 * 64 KiB is ever allocated.
+    """
+
+    def __init__(self, map_count: int = MAP_COUNT, map_size: int = MAP_SIZE) -> None:
+        self.map_count = map_count
+        self.map_size = map_size
+        self.counts: list[np.ndarray | None] = [None] * map_count
+        self.generations: list[np.ndarray | None] = [None] * map_count
+        self.generation = 1
+
+    def _allocate(self, map_id: int) -> None:
+        shape = (self.map_size, self.map_size)
+        self.counts[map_id] = np.zeros(shape, dtype=np.uint8)
+        self.generations[map_id] = np.zeros(shape, dtype=np.uint8)
+
+    def visit(self, map_id: int, x: int, y: int) -> tuple[bool, bool]:
+        # Returns whether this is the first visit this episode and the first visit ever
+        counts = self.counts[map_id]
+        if counts is None:
+            self._allocate(map_id)
+            counts = self.counts[map_id]
+        generations = self.generations[map_id]
+
+        count = counts[y, x]
+        if count < 255:
+            counts[y, x] = count + 1
+
+        new_episode = generations[y, x] != self.generation
+        generations[y, x] = self.generation
+        return bool(new_episode), bool(count == 0)
+
+    def visited(self, map_id: int, x: int, y: int, episode: bool = False) -> bool:
+        if self.counts[map_id] is None:
+            return False
+        if episode:
+            return bool(self.generations[map_id][y, x] == self.generation)
+        return bool(self.counts[map_id][y, x] > 0)
+
+    def new_episode(self) -> None:
+        self.generation += 1
+        if self.generation > 255:
+            for generations in self.generations:
+                if generations is not None:
+                    generations.fill(0)
+            self.generation = 1
+
+    def visit_counts(self, map_id: int) -> np.ndarray:
+        if self.counts[map_id] is None:
+            return np.zeros((self.map_size, self.map_size), dtype=np.uint8)
+        return self.counts[map_id]
+
+    def coverage(self) -> np.ndarray:
+        # Number of distinct tiles ever visited per map
+        return np.array(
+            [
+                0 if counts is None else np.count_nonzero(counts)
+                for counts in self.counts
+            ],
+            dtype=np.int64,
+        )
+
+    def episode_coverage(self) -> np.ndarray:
+        # Number of distinct tiles visited this episode per map
+        return np.array(
+            [
+                (
+                    0
+                    if generations is None
+                    else np.count_nonzero(generations == self.generation)
+                )
+                for generations in self.generations
+            ],
+            dtype=np.int64,
+        )
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+        # Ids of the visited maps and a copy of their counts
+        maps = [
+            map_id for map_id, counts in enumerate(self.counts) if counts is not None
+        ]
+        counts = np.zeros((len(maps), self.map_size, self.map_size), dtype=np.uint8)
+        for index, map_id in enumerate(maps):
+            counts[index] = self.counts[map_id]
+        return np.array(maps, dtype=np.int64), counts
+
+    def merge(self, maps: np.ndarray, counts: np.ndarray) -> None:
+        # Adds counts from a snapshot, saturating at 255
+        for map_id, map_counts in zip(maps.tolist(), counts):
+            if self.counts[map_id] is None:
+                self._allocate(map_id)
+            total = self.counts[map_id] + map_counts.astype(np.uint16)
+            np.minimum(total, 255, out=total)
+            self.counts[map_id][:] = total
+
+    def memory_bytes(self) -> int:
+        return sum(
+            counts.nbytes + generations.nbytes
+            for counts, generations in zip(self.counts, self.generations)
+            if counts is not None
+        )
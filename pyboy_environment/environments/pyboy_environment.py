@@ -1,13 +1,53 @@
+import io
+import pickle
+import time
 from abc import ABCMeta, abstractmethod
 from functools import cached_property
 from pathlib import Path
+from typing import Any, Callable
 
-import cv2
 import numpy as np
-from pyboy import PyBoy
+
+from pyboy_environment.environments import bitfield
+from pyboy_environment.environments.perf_stats import NULL_TIMER, PerfStats
+from pyboy_environment.environments.telemetry import Telemetry
+
+WRAM_START = 0xC000
+WRAM_END = 0xE000
+
+# Save states read from disk, shared by every environment in the process (and by forked workers)
+_state_cache: dict[str, bytes] = {}
+
+
+def load_state_file(path: str) -> bytes:
+    state = _state_cache.get(path)
+    if state is None:
+        with open(path, "rb") as f:
+            state = f.read()
+        _state_cache[path] = state
+    return state
 
 
 class PyboyEnvironment(metaclass=ABCMeta):
+    # Decode WRAM reads from one bulk copy per emulator frame instead of per-address lookups.
+    # PyBoy copies memory slices through a Python list, so only wram_span is copied - tasks
+    # narrow it to the addresses their stats decode, anything outside is read directly.
+    snapshot_wram = False
+    wram_span = (WRAM_START, WRAM_END)
+
+    # Python side of the episode state, saved next to the emulator state by snapshot().
+    # Tasks extend it with the fields their observation and reward depend on.
+    snapshot_fields: tuple[str, ...] = (
+        "steps",
+        "seed",
+        "start_delay",
+        "init_state_name",
+        "prior_game_stats",
+    )
+
+    # Whether the observation or reward reads the screen after each action. Tasks that
+    # never do opt out, so fast-forwarded actions skip rendering entirely
+    needs_pixels = True
 
     def __init__(
         self,
@@ -20,13 +60,23 @@ class PyboyEnvironment(metaclass=ABCMeta):
         release_button: list,
         emulation_speed: int = 0,
         headless: bool = False,
+        telemetry_sink: Any = None,
     ) -> None:
         self.task = task
         self.domain = domain
 
+        # Hot-loop events, logged unless a per-worker File or Queue sink is given
+        self.telemetry = Telemetry(telemetry_sink)
+
         path = f"{Path.home()}/cares_rl_configs/{self.domain}"
         self.rom_path = f"{path}/{rom_name}"
-        self.init_path = f"{path}/task_init_states/{init_state_file_name}"
+        self.init_state_dir = f"{path}/task_init_states"
+        self.init_path = f"{self.init_state_dir}/{init_state_file_name}"
+
+        # Named start states kept in memory, reset() restores the selected one
+        self.init_states: dict[str, bytes] = {}
+        self.init_state_name = init_state_file_name
+        self.register_init_state(init_state_file_name)
 
         self.combo_actions = 0
 
@@ -36,6 +86,28 @@ class PyboyEnvironment(metaclass=ABCMeta):
 
         self.act_freq = act_freq
 
+        # Bumped whenever a state is loaded so frame keyed caches are dropped
+        self._state_generation = 0
+        self._wram = None
+        self._wram_key = None
+        self._pinned_wram = None
+
+        self._raw_frame = None
+        self._frame_buffers: dict[tuple, np.ndarray] = {}
+
+        # Fast-forward ticks the frames of an action without rendering them, only the last
+        # frame is rendered and only if the task needs pixels
+        self.fast_forward = headless
+        self._frame_rendered = True
+
+        # Frames idled after loading the start state, varies the game's RNG between rollouts
+        self.start_delay = 0
+
+        self._perf = None
+
+        # Imported here, loading PyBoy is the bulk of the package import time
+        from pyboy import PyBoy
+
         head = "null" if headless else "SDL2"
         self.pyboy = PyBoy(
             self.rom_path,
@@ -57,53 +129,271 @@ class PyboyEnvironment(metaclass=ABCMeta):
         self.seed = seed
         # There isn't a random element to set that I am aware of...
 
+    def register_init_state(
+        self, name: str, file_name: str | None = None, state: bytes | None = None
+    ) -> None:
+        # Loads task_init_states/<file_name> (defaults to name) unless the raw state is given
+        if state is None:
+            file_name = name if file_name is None else file_name
+            state = load_state_file(f"{self.init_state_dir}/{file_name}")
+        self.init_states[name] = state
+
+    def set_init_state(self, name: str) -> None:
+        if name not in self.init_states:
+            raise ValueError(f"Unknown init state: {name}")
+        self.init_state_name = name
+
+    def save_state_bytes(self) -> bytes:
+        with io.BytesIO() as f:
+            self.pyboy.save_state(f)
+            return f.getvalue()
+
+    def load_state_bytes(self, state: bytes) -> None:
+        self.pyboy.load_state(io.BytesIO(state))
+        self._state_generation += 1
+
+    def snapshot(self) -> dict:
+        # Emulator state plus every field in snapshot_fields, a field that can't be saved is
+        # an error rather than a silently incomplete snapshot
+        fields = {}
+        for name in self.snapshot_fields:
+            try:
+                fields[name] = pickle.dumps(getattr(self, name))
+            except (AttributeError, TypeError, pickle.PicklingError) as error:
+                raise ValueError(
+                    f"Cannot snapshot {type(self).__name__}.{name}: {error}"
+                ) from error
+        return {"emulator": self.save_state_bytes(), "fields": fields}
+
+    def restore(self, snapshot: dict) -> None:
+        missing = set(self.snapshot_fields) - set(snapshot["fields"])
+        if missing:
+            raise ValueError(f"Snapshot is missing {', '.join(sorted(missing))}")
+
+        self.load_state_bytes(snapshot["emulator"])
+        for name, value in snapshot["fields"].items():
+            setattr(self, name, pickle.loads(value))
+
+    def _restore_start_state(self) -> None:
+        self.load_state_bytes(self.init_states[self.init_state_name])
+        if self.start_delay > 0:
+            self._tick(self.start_delay)
+
     def reset(self) -> np.ndarray:
         self.steps = 0
 
-        with open(self.init_path, "rb") as f:
-            self.pyboy.load_state(f)
+        self._restore_start_state()
 
         self.prior_game_stats = self._generate_game_stats()
 
         return self._get_state()
 
-    def grab_frame(self, height: int = 240, width: int = 300) -> np.ndarray:
-        frame = np.array(self.screen.image)
-        frame = cv2.resize(frame, (width, height))
-        # Convert to BGR for use with OpenCV
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+    def raw_frame(self) -> np.ndarray:
+        """
+        Read-only view of PyBoy's RGBA screen buffer - no copy, updated in place by rendered
+        ticks.
+
+        Raises RuntimeError if the last action was fast-forwarded without rendering, i.e. the
+        task sets needs_pixels = False. It does not fall back to rendering a frame itself.
+        """
+        if not self._frame_rendered:
+            # The buffer still holds an older frame, never hand that out as the current screen
+            raise RuntimeError(
+                f"{type(self).__name__} sets needs_pixels = False but read the screen, "
+                "set needs_pixels = True to render the last frame of each action"
+            )
+
+        if self._raw_frame is None:
+            self._raw_frame = self.screen.ndarray.view()
+            self._raw_frame.flags.writeable = False
+        return self._raw_frame
+
+    def _frame_buffer(self, stage: str, shape: tuple) -> np.ndarray:
+        buffer = self._frame_buffers.get((stage, shape))
+        if buffer is None:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._frame_buffers[(stage, shape)] = buffer
+        return buffer
+
+    def frame(
+        self,
+        height: int | None = None,
+        width: int | None = None,
+        gray: bool = False,
+        bgr: bool = False,
+    ) -> np.ndarray:
+        """
+        raw_frame() through opt-in conversion/resize stages writing into reused buffers - copy
+        the result to keep it.
+
+        Raises RuntimeError like raw_frame() when the task sets needs_pixels = False.
+        """
+        if gray and bgr:
+            raise ValueError("Choose either a grayscale or a BGR frame")
+
+        if gray or bgr or height is not None or width is not None:
+            import cv2
+
+        frame = self.raw_frame()
+        rows, cols = frame.shape[:2]
+
+        # Convert at native resolution, it is cheaper than converting the resized frame
+        if gray:
+            buffer = self._frame_buffer("gray", (rows, cols))
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2GRAY, dst=buffer)
+        elif bgr:
+            buffer = self._frame_buffer("bgr", (rows, cols, 3))
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR, dst=buffer)
+
+        if height is not None or width is not None:
+            height = rows if height is None else height
+            width = cols if width is None else width
+            buffer = self._frame_buffer("resize", (height, width) + frame.shape[2:])
+            frame = cv2.resize(frame, (width, height), dst=buffer)
+
         return frame
 
+    def grab_frame(self, height: int = 240, width: int = 300) -> np.ndarray:
+        # BGR for use with OpenCV, copied so callers can keep it
+        return self.frame(height, width, bgr=True).copy()
+
     def game_area(self) -> np.ndarray:
         return self.pyboy.game_area()
 
     def step(self, action) -> tuple:
+        # Each phase is timed while profiling, the null timer's marks do nothing otherwise
+        timer = NULL_TIMER if self._perf is None else self._perf.timer()
+
         self.steps += 1
 
         self._run_action_on_emulator(action)
+        timer.mark("action")
 
         state = self._get_state()
+        timer.mark("state")
 
         current_game_stats = self._generate_game_stats()
+        timer.mark("game_stats")
         reward = self._calculate_reward(current_game_stats)
+        timer.mark("reward")
 
         done = self._check_if_done(current_game_stats)
+        timer.mark("done")
         truncated = self._check_if_truncated(current_game_stats)
+        timer.mark("truncated")
+
+        self._after_step(current_game_stats, done, truncated)
+        timer.mark("after_step")
 
         self.prior_game_stats = current_game_stats
 
+        timer.finish("step")
+
         return state, reward, done, truncated
 
+    def _after_step(self, game_stats: dict, done: bool, truncated: bool) -> None:
+        # Hook for bookkeeping once a step's stats are final
+        pass
+
+    def _tick(self, count: int = 1) -> None:
+        if not self.fast_forward:
+            for _ in range(count):
+                self.pyboy.tick()
+            self._frame_rendered = True
+            return
+
+        # PyBoy only renders the last of the ticked frames
+        self.pyboy.tick(count, self.needs_pixels)
+        self._frame_rendered = self.needs_pixels
+
+    def _send_input(self, event) -> None:
+        self.pyboy.send_input(event)
+
+    # step() times its own phases, profiling swaps in timed wrappers for the rest as
+    # instance attributes
+    def enable_profiling(self) -> None:
+        if self._perf is None:
+            self._perf = PerfStats()
+        self.reset = self._profiled_reset
+        self._tick = self._profiled_tick
+        self._send_input = self._profiled_send_input
+
+    def disable_profiling(self) -> None:
+        for name in ("reset", "_tick", "_send_input"):
+            self.__dict__.pop(name, None)
+        self._perf = None
+
+    def perf_stats(self) -> dict[str, dict]:
+        return {} if self._perf is None else self._perf.summary()
+
+    def dump_perf_stats(self, path: str) -> None:
+        if self._perf is None:
+            raise RuntimeError(
+                "Profiling is not enabled - call enable_profiling() first"
+            )
+        self._perf.dump(path)
+
+    def _profiled_tick(self, count: int = 1) -> None:
+        start = time.perf_counter_ns()
+        type(self)._tick(self, count)
+        self._perf.record("tick", time.perf_counter_ns() - start)
+
+    def _profiled_send_input(self, event) -> None:
+        start = time.perf_counter_ns()
+        type(self)._send_input(self, event)
+        self._perf.record("input", time.perf_counter_ns() - start)
+
+    def _profiled_reset(self) -> np.ndarray:
+        start = time.perf_counter_ns()
+        state = type(self).reset(self)
+        self._perf.record("reset", time.perf_counter_ns() - start)
+        return state
+
+    def _frame_key(self) -> tuple[int, int]:
+        return (self._state_generation, self.pyboy.frame_count)
+
+    def _wram_snapshot(self) -> np.ndarray:
+        # Read-only copy of wram_span, refreshed once the emulator has ticked
+        if self._pinned_wram is not None:
+            return self._pinned_wram
+
+        key = self._frame_key()
+        if key != self._wram_key:
+            start, end = self.wram_span
+            self._wram = np.frombuffer(
+                bytes(self.pyboy.memory[start:end]), dtype=np.uint8
+            )
+            self._wram_key = key
+        return self._wram
+
+    def _read_pinned(self, wram: np.ndarray, reader: Callable[[], Any]) -> Any:
+        # Runs a reader against an earlier snapshot, e.g. a lazily decoded stat of a past frame
+        previous, self._pinned_wram = self._pinned_wram, wram
+        try:
+            return reader()
+        finally:
+            self._pinned_wram = previous
+
+    def _read_range(self, start: int, end: int) -> np.ndarray:
+        span_start, span_end = self.wram_span
+        if self.snapshot_wram and span_start <= start <= end <= span_end:
+            return self._wram_snapshot()[start - span_start : end - span_start]
+        return np.array(self.pyboy.memory[start:end], dtype=np.uint8)
+
     def _read_m(self, addr: int) -> int:
+        span_start, span_end = self.wram_span
+        if self.snapshot_wram and span_start <= addr < span_end:
+            return int(self._wram_snapshot()[addr - span_start])
         return self.pyboy.memory[addr]
 
     def _read_bit(self, addr: int, bit: int) -> bool:
-        # add padding so zero will read '0b100000000' instead of '0b0'
-        return bin(256 + self._read_m(addr))[-bit - 1] == "1"
+        return bitfield.read_bit(self._read_m(addr), bit)
 
-    # built-in since python 3.10
     def _bit_count(self, bits: int) -> int:
-        return bin(bits).count("1")
+        # The table covers single bytes, wider values fall back to int.bit_count
+        if 0 <= bits < 256:
+            return int(bitfield.POPCOUNT[bits])
+        return int(bits).bit_count()
 
     def _read_triple(self, start_add: int) -> int:
         return (
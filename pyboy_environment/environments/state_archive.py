@@ -0,0 +1,85 @@
+import math
+import random
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+
+class ArchiveCell:
+    __slots__ = ("state", "score", "steps", "visits", "chosen")
+
+    def __init__(self, state: bytes, score: Any, steps: int = 0) -> None:
+        self.state = state
+        self.score = score
+        # Steps taken from the task's start state to reach this state, across restores
+        self.steps = steps
+        self.visits = 1
+        self.chosen = 0
+
+
+class StateArchive:
+    """
+    Go-Explore style archive of compressed emulator snapshots keyed by cell.
+
+    A cell keeps the best scoring state that reached it. Once the compressed states exceed
+    `memory_budget` bytes the least recently used cells are evicted.
+    """
+
+    def __init__(
+        self, memory_budget: int = 256 * 1024 * 1024, compression_level: int = 1
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.compression_level = compression_level
+        self.cells: OrderedDict[tuple, ArchiveCell] = OrderedDict()
+        self.memory_used = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self.cells
+
+    def wants(self, key: tuple, score: Any) -> bool:
+        cell = self.cells.get(key)
+        return cell is None or score > cell.score
+
+    def visit(self, key: tuple) -> None:
+        cell = self.cells.get(key)
+        if cell is not None:
+            cell.visits += 1
+            self.cells.move_to_end(key)
+
+    def add(self, key: tuple, state: bytes, score: Any, steps: int = 0) -> None:
+        compressed = zlib.compress(state, self.compression_level)
+
+        cell = self.cells.pop(key, None)
+        if cell is None:
+            cell = ArchiveCell(compressed, score, steps)
+        else:
+            self.memory_used -= len(cell.state)
+            cell.state = compressed
+            cell.score = score
+            cell.steps = steps
+            cell.visits += 1
+
+        self.cells[key] = cell
+        self.memory_used += len(compressed)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.memory_used > self.memory_budget and len(self.cells) > 1:
+            _, cell = self.cells.popitem(last=False)
+            self.memory_used -= len(cell.state)
+            self.evictions += 1
+
+    def sample(self, rng: random.Random) -> tuple[tuple, bytes]:
+        # Cells that have been returned to less often are more likely to be chosen
+        keys = list(self.cells)
+        weights = [1.0 / math.sqrt(self.cells[key].chosen + 1) for key in keys]
+        key = rng.choices(keys, weights)[0]
+
+        cell = self.cells[key]
+        cell.chosen += 1
+        self.cells.move_to_end(key)
+        return key, zlib.decompress(cell.state)
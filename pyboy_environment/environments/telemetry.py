@@ -0,0 +1,117 @@
+import logging
+import queue
+import time
+from collections import Counter
+from typing import Any
+
+
+class LoggingSink:
+    def __init__(self, logger: logging.Logger | None = None) -> None:
+        self.logger = logger or logging.getLogger("pyboy_environment")
+
+    def write(self, timestamp: float, level: int, name: str, text: str) -> None:
+        self.logger.log(level, f"{name}: {text}")
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """
+    Appends one line per event to a buffered file, e.g. one file per worker process.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 64 * 1024) -> None:
+        self.file = open(path, "a", buffering=buffer_size, encoding="utf-8")
+
+    def write(self, timestamp: float, level: int, name: str, text: str) -> None:
+        self.file.write(
+            f"{timestamp:.3f} {logging.getLevelName(level)} {name}: {text}\n"
+        )
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class FileSinks:
+    """
+    Picklable sink factory for vector environment workers, one FileSink per worker.
+
+    `pattern` is formatted with the worker's index, e.g. "telemetry_{index}.log".
+    """
+
+    def __init__(self, pattern: str, buffer_size: int = 64 * 1024) -> None:
+        self.pattern = pattern
+        self.buffer_size = buffer_size
+
+    def __call__(self, index: int) -> FileSink:
+        return FileSink(self.pattern.format(index=index), self.buffer_size)
+
+
+class QueueSink:
+    """
+    Puts (timestamp, level, name, text) on a queue, dropping events while it is full.
+    """
+
+    def __init__(self, events: queue.Queue) -> None:
+        self.events = events
+        self.dropped = 0
+
+    def write(self, timestamp: float, level: int, name: str, text: str) -> None:
+        try:
+            self.events.put_nowait((timestamp, level, name, text))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        pass
+
+
+class Telemetry:
+    """
+    Named events for hot loops.
+
+    Every event is counted. Events below `level` are dropped before their message is
+    formatted, and each event is written at most once per `min_interval` seconds - the
+    skipped ones only show up in the counts.
+    """
+
+    def __init__(
+        self,
+        sink: Any = None,
+        level: int = logging.INFO,
+        min_interval: float = 1.0,
+    ) -> None:
+        self.sink = LoggingSink() if sink is None else sink
+        self.level = level
+        self.min_interval = min_interval
+        self.counts: Counter[str] = Counter()
+        self.suppressed: Counter[str] = Counter()
+        self._last_written: dict[str, float] = {}
+
+    def event(
+        self, name: str, message: str = "", *args: Any, level: int = logging.INFO
+    ) -> None:
+        self.counts[name] += 1
+        if level < self.level:
+            return
+
+        now = time.monotonic()
+        last = self._last_written.get(name)
+        if last is not None and now - last < self.min_interval:
+            self.suppressed[name] += 1
+            return
+        self._last_written[name] = now
+
+        # %-style arguments are only formatted for events that are written
+        text = message % args if args else message
+        self.sink.write(time.time(), level, name, text)
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {"count": count, "suppressed": self.suppressed[name]}
+            for name, count in self.counts.most_common()
+        }
+
+    def close(self) -> None:
+        self.sink.close()
@@ -5,11 +5,18 @@ Do NOT edit this file as it runs the evaluation methodology for the Trained Poke
 import argparse
 import json
 import logging
+import os
+import pickle
+import random
+import time
 from pathlib import Path
 
 import cares_reinforcement_learning.util.configurations as configurations
+import numpy as np
+import torch
 from cares_reinforcement_learning.util.network_factory import NetworkFactory
 from pyboy_environment.environments.pokemon.tasks.brock import PokemonBrock
+from pyboy_environment.vector_env import VectorPyboyEnvironment
 
 logging.basicConfig(level=logging.INFO)
 
@@ -25,24 +32,204 @@ def get_args():
 
     parse_args.add_argument("-r", "--results_path", type=str, required=True)
 
+    parse_args.add_argument(
+        "--rollouts",
+        type=int,
+        default=1,
+        help="Rollouts emulated in parallel worker processes with one policy call per rollout "
+        "state, rollout 0 is the score, 1 runs the serial evaluation",
+    )
+
+    parse_args.add_argument("--seed", type=int, default=10)
+
+    parse_args.add_argument(
+        "--checkpoint_interval",
+        type=int,
+        default=0,
+        help="Steps between snapshots of the serial evaluation, 0 disables them",
+    )
+
+    parse_args.add_argument(
+        "--checkpoint_path",
+        type=str,
+        default=None,
+        help="Scratch file the snapshots are written to and resumed from, in memory if unset",
+    )
+
     return parse_args.parse_args()
 
 
-def run_agent(env, agent, num_episodes, results_path):
+def save_checkpoint(env, step, state, checkpoint_path=None):
+    checkpoint = pickle.dumps(
+        {
+            "step": step,
+            "state": state,
+            "env": env.snapshot(),
+            "random": random.getstate(),
+            "numpy": np.random.get_state(),
+            "torch": torch.get_rng_state(),
+            "cuda": (
+                torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None
+            ),
+        }
+    )
+
+    if checkpoint_path is not None:
+        # Written next to the target and renamed, so a crash mid-write keeps the last one
+        temp_path = f"{checkpoint_path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(checkpoint)
+        os.replace(temp_path, checkpoint_path)
+
+    return checkpoint
+
+
+def load_checkpoint(env, checkpoint):
+    checkpoint = pickle.loads(checkpoint)
+
+    env.restore(checkpoint["env"])
+    random.setstate(checkpoint["random"])
+    np.random.set_state(checkpoint["numpy"])
+    torch.set_rng_state(checkpoint["torch"])
+    if checkpoint["cuda"] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(checkpoint["cuda"])
+
+    return checkpoint["step"], checkpoint["state"]
+
+
+# Transient failures worth replaying from a snapshot, anything else is a bug and raised
+RETRYABLE_ERRORS = (OSError, MemoryError)
+
+
+def run_agent(
+    env,
+    agent,
+    num_episodes,
+    results_path,
+    checkpoint_interval=0,
+    checkpoint_path=None,
+    max_retries=3,
+):
+    # With checkpoint_interval set, the state before every checkpoint_interval-th step is
+    # kept in memory (and in checkpoint_path if given). A failing step is retried from the
+    # last snapshot, and a restarted run resumes from checkpoint_path.
+    checkpoint = None
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "rb") as file:
+            checkpoint = file.read()
+
+    if checkpoint is not None:
+        start, state = load_checkpoint(env, checkpoint)
+        logging.info(f"Resuming from step {start} of {checkpoint_path}")
+    else:
+        start = 0
+        state = env.reset()
+
+    retries = 0
+    while True:
+        try:
+            for step in range(start, num_episodes):
+                if (
+                    checkpoint_interval > 0
+                    and step % checkpoint_interval == 0
+                    and step != start
+                ):
+                    checkpoint = save_checkpoint(env, step, state, checkpoint_path)
+                if step % 100 == 0:
+                    logging.info(f"Step: {step}")
+                action = agent.select_action_from_policy(state, evaluation=True)
+                next_state, reward, done, _ = env.step(action)
+                state = next_state
+                if done:
+                    state = env.reset()
+            break
+        except RETRYABLE_ERRORS:
+            if checkpoint is None or retries >= max_retries:
+                raise
+            retries += 1
+            logging.exception("Evaluation failed, retrying from the last snapshot")
+            start, state = load_checkpoint(env, checkpoint)
+
+    final_stats = env._generate_game_stats()
+
+    final_stats["actions"] = step
+
+    logging.info(f"Final Stats: {final_stats}")
+
+    with open(f"{results_path}/results.json", "w", encoding="utf-8") as file:
+        json.dump(final_stats, file)
+
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+def select_actions(agent, states):
+    # One policy call per rollout, the rollouts only share the vectorized emulator step
+    return np.stack(
+        [
+            np.asarray(
+                agent.select_action_from_policy(state, evaluation=True),
+                dtype=np.float32,
+            ).reshape(-1)
+            for state in states
+        ]
+    )
+
+
+# Rollouts idle a seeded number of frames after each reset so their game RNG diverges
+MAX_START_DELAY = 256
+
+# Fields averaged over the rollouts, next to rollout 0's score
+AGGREGATE_FIELDS = ("badges", "caught_pokemon", "seen_pokemon", "money")
 
-    state = env.reset()
+
+def run_agent_parallel(env, agent, num_episodes, results_path, seed):
+    # Rollout 0 starts like the serial evaluation and is the reported score, the others
+    # idle a seeded delay first and are reported alongside it
+    seeds = [seed + index for index in range(env.num_envs)]
+    env.set_seed(seed)
+    env.set_attr(
+        "start_delay",
+        [0]
+        + [
+            random.Random(rollout_seed).randrange(1, MAX_START_DELAY)
+            for rollout_seed in seeds[1:]
+        ],
+    )
+
+    start = time.perf_counter()
+    states = env.reset()
     for step in range(0, num_episodes):
         if step % 100 == 0:
             logging.info(f"Step: {step}")
-        action = agent.select_action_from_policy(state, evaluation=True)
-        next_state, reward, done, _ = env.step(action)
-        state = next_state
-        if done:
-            state = env.reset()
+        actions = select_actions(agent, states)
+        states, _, _, _ = env.step(actions)
+    elapsed = time.perf_counter() - start
 
-    final_stats = env._generate_game_stats()
+    rollouts = env.game_stats()
+    for stats, rollout_seed in zip(rollouts, seeds):
+        stats["actions"] = step
+        stats["seed"] = rollout_seed
 
-    final_stats["actions"] = step
+    final_stats = dict(rollouts[0])
+    final_stats["rollouts"] = rollouts
+    final_stats["rollout_mean"] = {
+        field: float(np.mean([stats[field] for stats in rollouts]))
+        for field in AGGREGATE_FIELDS
+    }
+    final_stats["rollout_mean"]["levels"] = float(
+        np.mean([np.mean(stats["levels"]) for stats in rollouts])
+    )
+    final_stats["rollout_mean"]["xp"] = float(
+        np.mean([np.mean(stats["xp"]) for stats in rollouts])
+    )
+    final_stats["throughput"] = {
+        "rollouts": env.num_envs,
+        "steps": env.num_envs * num_episodes,
+        "seconds": elapsed,
+        "steps_per_sec": env.num_envs * num_episodes / elapsed,
+        "vector_steps_per_sec": num_episodes / elapsed,
+    }
 
     logging.info(f"Final Stats: {final_stats}")
 
@@ -50,7 +237,7 @@ def run_agent(env, agent, num_episodes, results_path):
         json.dump(final_stats, file)
 
 
-def run(results_path, model_file_path, model_file_name):
+def create_agent(observation_space, action_num, model_file_path, model_file_name):
     algorithm = model_file_name.split("-")[0]
 
     class_ = getattr(configurations, f"{algorithm}Config")
@@ -58,21 +245,67 @@ def run(results_path, model_file_path, model_file_name):
 
     network_factory = NetworkFactory()
 
-    brock_task = PokemonBrock(act_freq=24, headless=True)
-
     agent = network_factory.create_network(
-        brock_task.observation_space, brock_task.action_num, algorithm_config
+        observation_space, action_num, algorithm_config
     )
 
     agent.load_models(model_file_path, model_file_name)
+    return agent
 
-    run_agent(brock_task, agent, 10000, results_path)
+
+def run(
+    results_path,
+    model_file_path,
+    model_file_name,
+    rollouts=1,
+    seed=10,
+    checkpoint_interval=0,
+    checkpoint_path=None,
+):
+    if rollouts > 1:
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+
+        with VectorPyboyEnvironment(
+            "pokemon", "brock", act_freq=24, num_envs=rollouts, headless=True
+        ) as env:
+            agent = create_agent(
+                env.observation_space, env.action_num, model_file_path, model_file_name
+            )
+            run_agent_parallel(env, agent, 10000, results_path, seed)
+        return
+
+    brock_task = PokemonBrock(act_freq=24, headless=True)
+
+    agent = create_agent(
+        brock_task.observation_space,
+        brock_task.action_num,
+        model_file_path,
+        model_file_name,
+    )
+
+    run_agent(
+        brock_task,
+        agent,
+        10000,
+        results_path,
+        checkpoint_interval=checkpoint_interval,
+        checkpoint_path=checkpoint_path,
+    )
 
 
 def main():
     args = get_args()
 
-    run(args.results_path, args.model_path, args.model_name)
+    run(
+        args.results_path,
+        args.model_path,
+        args.model_name,
+        rollouts=args.rollouts,
+        seed=args.seed,
+        checkpoint_interval=args.checkpoint_interval,
+        checkpoint_path=args.checkpoint_path,
+    )
 
 
 if __name__ == "__main__":
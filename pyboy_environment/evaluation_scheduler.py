@@ -0,0 +1,355 @@
+"""
+Evaluates many submissions concurrently for pull_results.
+
+Each job gets its own copy of the package with the submitted brock.py, so jobs never
+overwrite each other's files, and runs evaluate.py in a virtualenv shared by every
+submission with the same requirements. Submissions come from Google Drive or, offline,
+from a local directory laid out the same way:
+
+    <root>/<upi>/requirements.txt
+    <root>/<upi>/brock.py
+    <root>/<upi>/<model folder>/<model files>
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+PACKAGE_ROOT = Path(__file__).parent.parent
+
+# Sets the resource limits in the child and then execs evaluate.py, so no part of the
+# evaluation runs unlimited. Arguments: cpu seconds, address space bytes (-1 for none),
+# then the command.
+LIMIT_WRAPPER = """
+import os, resource, sys
+cpu_seconds, memory = int(sys.argv[1]), int(sys.argv[2])
+if cpu_seconds >= 0:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+if memory >= 0:
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+os.execv(sys.argv[3], sys.argv[3:])
+"""
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def process_group_cpu_seconds(pgid: int) -> float:
+    # User and system time of every live process in the group, including the children
+    # they have reaped, e.g. finished vector environment workers
+    ticks = 0
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", "rb") as file:
+                stat = file.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name, which may itself contain spaces
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        if int(fields[2]) == pgid:
+            ticks += sum(int(field) for field in fields[11:15])
+    return ticks / CLOCK_TICKS
+
+
+class Submission(NamedTuple):
+    upi: str
+    requirements: Any
+    brock: Any
+    # Model file name to whatever the source needs to fetch it
+    models: dict[str, Any]
+
+
+class LocalDirectorySource:
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def submissions(self) -> list[Submission]:
+        submissions = []
+        for folder in sorted(self.root.iterdir()):
+            if not folder.is_dir():
+                continue
+            model_folders = sorted(path for path in folder.iterdir() if path.is_dir())
+            if not model_folders:
+                logging.warning(f"Skipping {folder.name}: no model folder")
+                continue
+            models = {path.name: path for path in sorted(model_folders[0].iterdir())}
+            submissions.append(
+                Submission(
+                    folder.name,
+                    folder / "requirements.txt",
+                    folder / "brock.py",
+                    models,
+                )
+            )
+        return submissions
+
+    def fetch(self, handle: Path, path: Path) -> None:
+        shutil.copyfile(handle, path)
+
+
+class DriveSource:
+    def __init__(self, drive, directory: dict) -> None:
+        # `directory` as returned by pull_results.read_folder
+        self.drive = drive
+        self.directory = directory
+
+    def submissions(self) -> list[Submission]:
+        submissions = []
+        for folder in self.directory["folders"]:
+            files = folder["files"]
+            model_files = folder["folders"][0]["files"]
+            submissions.append(
+                Submission(
+                    folder["title"],
+                    files["requirements.txt"]["id"],
+                    files["brock.py"]["id"],
+                    {name: info["id"] for name, info in model_files.items()},
+                )
+            )
+        return submissions
+
+    def fetch(self, handle: str, path: Path) -> None:
+        file = self.drive.CreateFile({"id": handle})
+        file.GetContentFile(str(path))
+
+
+class EvaluationScheduler:
+    """
+    Runs evaluate.py for every submission of a source on `workers` threads.
+
+    `cpu_seconds` is the CPU time budget of each evaluation, summed over its whole process
+    group so vector environment workers share it, and `memory_mb` the RLIMIT_AS of each
+    of its processes. `timeout` is its wall clock limit in seconds. Virtualenvs live in
+    `venv_root` keyed by a hash of the requirements and the cares_rl revision, and all pip
+    installs share the wheel cache in `pip_cache`.
+    """
+
+    # Seconds between checks of an evaluation's wall clock and CPU time
+    poll_interval = 1.0
+
+    def __init__(
+        self,
+        source,
+        results_root: str = f"{PACKAGE_ROOT}/results",
+        workers: int = 1,
+        cpu_seconds: int | None = None,
+        memory_mb: int | None = None,
+        timeout: float | None = None,
+        venv_root: str = f"{Path.home()}/venv",
+        pip_cache: str = f"{Path.home()}/.cache/pip",
+        cares_rl_path: str = f"{Path.home()}/workspace/cares_reinforcement_learning",
+        evaluate_args: list[str] | None = None,
+    ) -> None:
+        self.source = source
+        self.results_root = Path(results_root)
+        self.workers = workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self.venv_root = Path(venv_root)
+        self.pip_cache = Path(pip_cache)
+        self.cares_rl_path = Path(cares_rl_path)
+        self.evaluate_args = evaluate_args or []
+
+        self._venv_locks: dict[str, threading.Lock] = {}
+        self._venv_locks_lock = threading.Lock()
+        self._cares_rl_revision: str | None = None
+
+    def run(self) -> list[dict]:
+        submissions = self.source.submissions()
+        logging.info(
+            f"Evaluating {len(submissions)} submissions on {self.workers} workers"
+        )
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.evaluate_submission, submissions))
+
+    def evaluate_submission(self, submission: Submission) -> dict:
+        start = time.perf_counter()
+        status = {
+            "upi": submission.upi,
+            "exit_code": None,
+            "timed_out": False,
+            "cpu_exceeded": False,
+        }
+        try:
+            results_path, package_path, model_name = self._stage(submission)
+            python_bin = self.environment(results_path / "requirements.txt")
+            status.update(
+                self._evaluate(python_bin, results_path, package_path, model_name)
+            )
+        except Exception as error:
+            logging.exception(f"Evaluation of {submission.upi} failed")
+            status["error"] = f"{type(error).__name__}: {error}"
+
+        status["seconds"] = time.perf_counter() - start
+        logging.info(f"Finished {submission.upi}: {status}")
+        return status
+
+    def _stage(self, submission: Submission) -> tuple[Path, Path, str]:
+        results_path = self.results_root / submission.upi
+        model_path = results_path / "models"
+        model_path.mkdir(parents=True, exist_ok=True)
+
+        # Private copy of the package so concurrent jobs each run their own brock.py
+        package_path = results_path / "package"
+        shutil.rmtree(package_path, ignore_errors=True)
+        shutil.copytree(
+            PACKAGE_ROOT / "pyboy_environment",
+            package_path / "pyboy_environment",
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
+
+        self.source.fetch(submission.requirements, results_path / "requirements.txt")
+        self.source.fetch(
+            submission.brock,
+            package_path / "pyboy_environment/environments/pokemon/tasks/brock.py",
+        )
+
+        model_name = None
+        for file_name, handle in submission.models.items():
+            model_name = file_name.split("_")[0]
+            self.source.fetch(handle, model_path / file_name)
+
+        return results_path, package_path, model_name
+
+    def _venv_lock(self, key: str) -> threading.Lock:
+        with self._venv_locks_lock:
+            return self._venv_locks.setdefault(key, threading.Lock())
+
+    def cares_rl_revision(self) -> str:
+        # Commit plus uncommitted changes, or the file listing when it isn't a git checkout
+        if self._cares_rl_revision is None:
+            digest = hashlib.sha256()
+            try:
+                for args in (["rev-parse", "HEAD"], ["status", "--porcelain"]):
+                    digest.update(
+                        subprocess.run(
+                            ["git", "-C", str(self.cares_rl_path), *args],
+                            capture_output=True,
+                            check=True,
+                        ).stdout
+                    )
+            except (OSError, subprocess.CalledProcessError):
+                for path in sorted(self.cares_rl_path.rglob("*")):
+                    if path.is_file():
+                        stat = path.stat()
+                        digest.update(
+                            f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+                        )
+            self._cares_rl_revision = digest.hexdigest()
+        return self._cares_rl_revision
+
+    def environment(self, requirements: Path) -> Path:
+        # One virtualenv per distinct set of requirements and cares_rl revision, built
+        # once and then reused
+        digest = hashlib.sha256()
+        digest.update(requirements.read_bytes())
+        digest.update((self.cares_rl_path / "requirements.txt").read_bytes())
+        digest.update(self.cares_rl_revision().encode())
+        key = digest.hexdigest()[:16]
+
+        venv_dir = self.venv_root / key
+        python_bin = venv_dir / "bin/python3"
+        ready = venv_dir / ".ready"
+
+        with self._venv_lock(key):
+            if ready.exists():
+                return python_bin
+
+            logging.info(f"Creating virtualenv {venv_dir}")
+            import virtualenv
+
+            shutil.rmtree(venv_dir, ignore_errors=True)
+            virtualenv.cli_run([str(venv_dir)])
+
+            env = dict(os.environ, PIP_CACHE_DIR=str(self.pip_cache))
+            for args in [
+                ["-r", str(self.cares_rl_path / "requirements.txt")],
+                [str(self.cares_rl_path)],
+                ["-r", str(requirements)],
+            ]:
+                subprocess.run(
+                    [str(python_bin), "-m", "pip", "install", *args],
+                    env=env,
+                    check=True,
+                )
+
+            ready.touch()
+        return python_bin
+
+    def _limited(self, command: list[str]) -> list[str]:
+        if self.cpu_seconds is None and self.memory_mb is None:
+            return command
+        # The budget is shared by the group, a single process can't exceed it either
+        cpu_seconds = -1 if self.cpu_seconds is None else int(self.cpu_seconds)
+        memory = -1 if self.memory_mb is None else self.memory_mb * 1024 * 1024
+        return [
+            command[0],
+            "-c",
+            LIMIT_WRAPPER,
+            str(cpu_seconds),
+            str(memory),
+            *command,
+        ]
+
+    def _wait(self, process: subprocess.Popen, name: str) -> dict:
+        # Polls the wall clock and the group's CPU time, killing the whole group when
+        # either runs out
+        start = time.monotonic()
+        while True:
+            try:
+                return {"exit_code": process.wait(timeout=self.poll_interval)}
+            except subprocess.TimeoutExpired:
+                pass
+
+            reason = None
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                reason = "timed_out"
+                logging.warning(f"{name} timed out after {self.timeout}s")
+            elif (
+                self.cpu_seconds is not None
+                and process_group_cpu_seconds(process.pid) > self.cpu_seconds
+            ):
+                reason = "cpu_exceeded"
+                logging.warning(f"{name} used more than {self.cpu_seconds}s of CPU")
+
+            if reason is not None:
+                os.killpg(process.pid, signal.SIGKILL)
+                return {"exit_code": process.wait(), reason: True}
+
+    def _evaluate(
+        self, python_bin: Path, results_path: Path, package_path: Path, model_name: str
+    ) -> dict:
+        env = dict(os.environ, PYTHONPATH=str(package_path))
+        command = [
+            str(python_bin),
+            "evaluate.py",
+            "--upi",
+            results_path.name,
+            "--model_path",
+            str(results_path),
+            "--model_name",
+            model_name,
+            "--results_path",
+            str(results_path),
+            *self.evaluate_args,
+        ]
+        with open(results_path / "evaluate.log", "w", encoding="utf-8") as log:
+            process = subprocess.Popen(
+                self._limited(command),
+                cwd=package_path / "pyboy_environment",
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+            return self._wait(process, results_path.name)
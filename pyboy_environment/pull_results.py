@@ -2,60 +2,19 @@
 Do NOT edit this file as it runs the evaluation methodology for the Trained Pokemon agents.
 """
 
+import argparse
 import logging
-import os
-import subprocess
 from pathlib import Path
 
-import virtualenv
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
+from pyboy_environment.evaluation_scheduler import (
+    DriveSource,
+    EvaluationScheduler,
+    LocalDirectorySource,
+)
 
 logging.basicConfig(level=logging.INFO)
 
 
-def run_venv(upi, requirement_path, model_path, model_name):
-    path = f"{os.path.expanduser('~')}/venv"
-    venv_dir = os.path.join(path, f"{upi}")
-    virtualenv.cli_run([venv_dir])
-
-    python_bin = f"{path}/{upi}/bin/python3"
-
-    cares_rl_path = f"{Path.home()}/workspace/cares_reinforcement_learning"
-
-    command = (
-        f". {venv_dir}/bin/activate && pip install -r {cares_rl_path}/requirements.txt"
-    )
-    os.system(command)
-
-    command = f". {venv_dir}/bin/activate && pip install {cares_rl_path}"
-    os.system(command)
-
-    command = f". {venv_dir}/bin/activate && pip install -r {requirement_path}/requirements.txt"
-    os.system(command)
-
-    command = f". {venv_dir}/bin/activate && pip install {requirement_path}"
-    os.system(command)
-
-    p = subprocess.Popen(
-        [
-            python_bin,
-            "evaluate.py",
-            "--upi",
-            upi,
-            "--model_path",
-            model_path,
-            "--model_name",
-            model_name,
-            "--results_path",
-            model_path,
-        ]
-    )
-
-    exit_code = p.wait()
-    print(f"Exit code: {exit_code} {upi}")
-
-
 def read_folder(drive, title, file_id):
     folder = {}
 
@@ -93,7 +52,48 @@ def print_folders(directory, tab=0):
         print_folders(folder, tab=tab + 5)
 
 
-def main():
+def get_args():
+    parse_args = argparse.ArgumentParser()
+
+    parse_args.add_argument(
+        "--local_dir",
+        type=str,
+        default=None,
+        help="Read submissions from this directory instead of Google Drive",
+    )
+    parse_args.add_argument(
+        "-r",
+        "--results_path",
+        type=str,
+        default=f"{Path(__file__).parent.parent}/results",
+    )
+
+    parse_args.add_argument("--workers", type=int, default=1)
+    parse_args.add_argument("--cpu_seconds", type=int, default=None)
+    parse_args.add_argument("--memory_mb", type=int, default=None)
+    parse_args.add_argument(
+        "--timeout", type=float, default=None, help="Wall clock seconds per submission"
+    )
+
+    parse_args.add_argument("--venv_root", type=str, default=f"{Path.home()}/venv")
+    parse_args.add_argument(
+        "--pip_cache", type=str, default=f"{Path.home()}/.cache/pip"
+    )
+    parse_args.add_argument(
+        "--evaluate_args",
+        type=str,
+        nargs=argparse.REMAINDER,
+        default=[],
+        help="Passed on to evaluate.py, e.g. --evaluate_args --rollouts 4",
+    )
+
+    return parse_args.parse_args()
+
+
+def drive_source():
+    from pydrive2.auth import GoogleAuth
+    from pydrive2.drive import GoogleDrive
+
     gauth = GoogleAuth()
     gauth.LocalWebserverAuth()
 
@@ -108,50 +108,31 @@ def main():
 
     print_folders(directory)
 
-    for folders in directory["folders"]:
-        upi = folders["title"]
-        print(f"Title: {upi}")
-
-        files = folders["files"]
-        requirements_id = files["requirements.txt"]["id"]
-        brock_task_id = files["brock.py"]["id"]
-
-        model_folder = folders["folders"][0]
-        logging.info(f"{model_folder=}")
-
-        requirement_path = f"{Path(__file__).parent.parent}"
-        logging.info(f"{requirement_path=}")
+    return DriveSource(drive, directory)
 
-        brock_path = f"{Path(__file__).parent.parent}/pyboy_environment/environments/pokemon/tasks"
-        logging.info(f"{brock_path=}")
 
-        results_path = f"{Path(__file__).parent.parent}/results/{upi}"
-        logging.info(f"Saving data into: {results_path}")
-
-        if not os.path.exists(results_path):
-            os.makedirs(results_path)
-
-        file = drive.CreateFile({"id": requirements_id})
-        file.GetContentFile(f"{requirement_path}/requirements.txt")
-
-        file = drive.CreateFile({"id": brock_task_id})
-        file.GetContentFile(f"{brock_path}/brock.py")
-
-        logging.info(f"{type(model_folder['files'])=}")
-
-        for file_name, model_info in model_folder["files"].items():
-            model_name = file_name.split("_")[0]
-            logging.info(f"{file_name=}")
-            logging.info(f"{model_info=}")
-            logging.info(f"{model_name=}")
-            file = drive.CreateFile({"id": model_info["id"]})
-
-            model_path = f"{results_path}/models"
-            if not os.path.exists(model_path):
-                os.makedirs(model_path)
-            file.GetContentFile(f"{model_path}/{file_name}")
+def main():
+    args = get_args()
+
+    if args.local_dir is not None:
+        source = LocalDirectorySource(args.local_dir)
+    else:
+        source = drive_source()
+
+    scheduler = EvaluationScheduler(
+        source,
+        results_root=args.results_path,
+        workers=args.workers,
+        cpu_seconds=args.cpu_seconds,
+        memory_mb=args.memory_mb,
+        timeout=args.timeout,
+        venv_root=args.venv_root,
+        pip_cache=args.pip_cache,
+        evaluate_args=args.evaluate_args,
+    )
 
-        run_venv(upi, requirement_path, results_path, model_name)
+    for status in scheduler.run():
+        logging.info(f"{status}")
 
 
 if __name__ == "__main__":
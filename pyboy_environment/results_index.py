@@ -0,0 +1,171 @@
+"""
+SQLite index of evaluation results for compare_results.
+
+Results are laid out as <root>/[<round>/]<upi>/results.json. Ingesting a root only parses
+files whose size or mtime changed since they were last indexed, and stores the tiers of
+compare_performance as columns so rankings are a single ordered query.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+# Descending order of these columns ranks results exactly like compare_performance
+SORT_COLUMNS = ("badges", "actions_key", "caught", "seen", "mean_levels", "mean_xp")
+
+ORDER_BY = ", ".join(f"{column} DESC" for column in SORT_COLUMNS) + ", path"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT PRIMARY KEY,
+    round TEXT NOT NULL,
+    upi TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    badges INTEGER NOT NULL,
+    actions_key INTEGER NOT NULL,
+    caught INTEGER NOT NULL,
+    seen INTEGER NOT NULL,
+    mean_levels REAL NOT NULL,
+    mean_xp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_rank ON results (
+    round, {", ".join(f"{column} DESC" for column in SORT_COLUMNS)}
+);
+"""
+
+
+def sort_key(result: dict) -> tuple:
+    # Actions only break ties between results that both have badges
+    return (
+        result["badges"],
+        result["actions"] if result["badges"] > 0 else 0,
+        result["caught_pokemon"],
+        result["seen_pokemon"],
+        float(np.mean(result["levels"])),
+        float(np.mean(result["xp"])),
+    )
+
+
+class ResultsIndex:
+    def __init__(self, database: str) -> None:
+        self.connection = sqlite3.connect(database)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ResultsIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def ingest(self, results_root: str) -> int:
+        # Returns the number of results (re)parsed, results deleted from disk are dropped
+        root = Path(results_root).resolve()
+        prefix = f"{root}{os.sep}"
+        known = {
+            row["path"]: (row["mtime_ns"], row["size"])
+            for row in self.connection.execute(
+                "SELECT path, mtime_ns, size FROM results "
+                "WHERE substr(path, 1, length(?)) = ?",
+                (prefix, prefix),
+            )
+        }
+
+        # Two fixed depths rather than a recursive walk, result directories hold package copies
+        results_files = [*root.glob("*/results.json"), *root.glob("*/*/results.json")]
+
+        rows = []
+        for results_file in results_files:
+            path = str(results_file)
+            stat = results_file.stat()
+            if known.pop(path, None) == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            try:
+                with open(results_file, "r", encoding="utf-8") as file:
+                    result = json.load(file)
+                key = sort_key(result)
+            except (OSError, ValueError, KeyError, TypeError):
+                logging.warning(f"Skipping unreadable results {path}")
+                continue
+
+            upi_directory = results_file.parent
+            round_name = str(upi_directory.parent.relative_to(root))
+            rows.append(
+                (
+                    path,
+                    "" if round_name == "." else round_name,
+                    upi_directory.name,
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    *key,
+                    json.dumps(result),
+                )
+            )
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.connection.executemany(
+                "DELETE FROM results WHERE path = ?", [(path,) for path in known]
+            )
+
+        logging.info(
+            f"Indexed {len(rows)} new or changed results, dropped {len(known)} from {root}"
+        )
+        return len(rows)
+
+    def _result(self, row: sqlite3.Row) -> dict:
+        result = json.loads(row["data"])
+        result["upi"] = row["upi"]
+        result["round"] = row["round"]
+        return result
+
+    def top(self, k: int | None = None, round_name: str | None = None) -> list[dict]:
+        # Best k results (all when k is None), of one round or across every round
+        query = "SELECT upi, round, data FROM results"
+        params: list = []
+        if round_name is not None:
+            query += " WHERE round = ?"
+            params.append(round_name)
+        query += f" ORDER BY {ORDER_BY}"
+        if k is not None:
+            query += " LIMIT ?"
+            params.append(k)
+        return [self._result(row) for row in self.connection.execute(query, params)]
+
+    def rank(self, upi: str, round_name: str = "") -> int | None:
+        # 1 based, ties share the better rank
+        row = self.connection.execute(
+            f"SELECT {', '.join(SORT_COLUMNS)} FROM results WHERE upi = ? AND round = ?",
+            (upi, round_name),
+        ).fetchone()
+        if row is None:
+            return None
+
+        columns = ", ".join(SORT_COLUMNS)
+        placeholders = ", ".join("?" * len(SORT_COLUMNS))
+        (better,) = self.connection.execute(
+            f"SELECT COUNT(*) FROM results WHERE round = ? AND ({columns}) > ({placeholders})",
+            (round_name, *row),
+        ).fetchone()
+        return better + 1
+
+    def rounds(self) -> list[str]:
+        return [
+            row["round"]
+            for row in self.connection.execute(
+                "SELECT DISTINCT round FROM results ORDER BY round"
+            )
+        ]
@@ -1,6 +1,18 @@
-from pyboy_environment.environments import PyboyEnvironment
-from pyboy_environment.environments.mario.mario_run import MarioRun
-from pyboy_environment.environments.pokemon.tasks.brock import PokemonBrock
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pyboy_environment.environments import PyboyEnvironment
+
+# Tasks are imported on first use so importing the suite does not load the emulator stacks
+ENVIRONMENTS = {
+    "mario": {
+        "run": "pyboy_environment.environments.mario.mario_run:MarioRun",
+    },
+    "pokemon": {
+        "brock": "pyboy_environment.environments.pokemon.tasks.brock:PokemonBrock",
+    },
+}
 
 
 def make(
@@ -9,18 +21,24 @@ def make(
     act_freq: int,
     emulation_speed: int = 0,
     headless: bool = False,
-) -> PyboyEnvironment:
-
-    if domain == "mario":
-        if task == "run":
-            env = MarioRun(act_freq, emulation_speed, headless)
-        else:
-            raise ValueError(f"Unknown Mario task: {task}")
-    elif domain == "pokemon":
-        if task == "brock":
-            env = PokemonBrock(act_freq, emulation_speed, headless)
-        else:
-            raise ValueError(f"Unknown Pokemon task: {task}")
+    telemetry_sink: Any = None,
+) -> "PyboyEnvironment":
+
+    if domain not in ENVIRONMENTS:
+        raise ValueError(f"Unknown pyboy environment: {domain}")
+
+    tasks = ENVIRONMENTS[domain]
+    if task not in tasks:
+        raise ValueError(f"Unknown {domain.capitalize()} task: {task}")
+
+    module_name, class_name = tasks[task].split(":")
+    env_class = getattr(importlib.import_module(module_name), class_name)
+
+    # Only passed when given, so tasks without the parameter still construct
+    if telemetry_sink is None:
+        env = env_class(act_freq, emulation_speed, headless)
     else:
-        raise ValueError(f"Unknown pyboy environment: {task}")
+        env = env_class(
+            act_freq, emulation_speed, headless, telemetry_sink=telemetry_sink
+        )
     return env
@@ -0,0 +1,391 @@
+"""
+Runs several pyboy environments from `suite.make` in worker processes.
+
+Observations, rewards and done flags are written by the workers straight into
+preallocated shared-memory NumPy arrays so only short commands travel through the pipes.
+"""
+
+import multiprocessing as mp
+import traceback
+from typing import Any, Callable
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from pyboy_environment import suite
+
+
+def _attach(spec) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    name, shape, dtype = spec
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _worker(index, remote, parent_remote, env_kwargs, telemetry_sink_factory) -> None:
+    parent_remote.close()
+
+    try:
+        telemetry_sink = (
+            None if telemetry_sink_factory is None else telemetry_sink_factory(index)
+        )
+        env = suite.make(**env_kwargs, telemetry_sink=telemetry_sink)
+        remote.send(("ok", (env.observation_space, env.action_num)))
+    except Exception:
+        remote.send(("error", traceback.format_exc()))
+        remote.close()
+        return
+
+    specs = remote.recv()
+    if not isinstance(specs, dict):
+        # Parent gave up during start up
+        env.pyboy.stop(save=False)
+        remote.close()
+        return
+
+    memories, buffers = {}, {}
+    for key, spec in specs.items():
+        memories[key], buffers[key] = _attach(spec)
+
+    try:
+        while True:
+            command, data = remote.recv()
+            try:
+                if command == "reset":
+                    buffers["observations"][index] = env.reset()
+                    remote.send(("ok", None))
+                elif command == "step":
+                    action = buffers["actions"][index].copy()
+                    state, reward, done, truncated = env.step(action)
+                    if done or truncated:
+                        # Keep the terminal observation and start the next episode straight away
+                        buffers["final_observations"][index] = state
+                        state = env.reset()
+                    buffers["observations"][index] = state
+                    buffers["rewards"][index] = reward
+                    buffers["dones"][index] = done
+                    buffers["truncateds"][index] = truncated
+                    remote.send(("ok", None))
+                elif command == "game_stats":
+                    remote.send(("ok", env._generate_game_stats().copy()))
+                elif command == "set_attr":
+                    setattr(env, *data)
+                    remote.send(("ok", None))
+                elif command == "seed":
+                    env.set_seed(data)
+                    remote.send(("ok", None))
+                elif command == "close":
+                    remote.send(("ok", None))
+                    break
+                else:
+                    raise ValueError(f"Unknown worker command: {command}")
+            except Exception:
+                remote.send(("error", traceback.format_exc()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        env.pyboy.stop(save=False)
+        env.telemetry.close()
+        buffers.clear()
+        for memory in memories.values():
+            memory.close()
+        remote.close()
+
+
+class VectorPyboyEnvironment:
+    """
+    Batched `reset`/`step` over `num_envs` environments, each in its own process.
+
+    The arrays returned by `reset` and `step` are the shared buffers themselves and are
+    overwritten by the next call - copy them if they need to be kept. Sub-environments that
+    finish are reset automatically, their last observation is kept in `final_observations`.
+
+    `telemetry_sink_factory(index)` builds each worker's telemetry sink inside the worker,
+    e.g. telemetry.FileSinks("telemetry_{index}.log"). Without it workers log as usual.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        task: str,
+        act_freq: int,
+        num_envs: int,
+        emulation_speed: int = 0,
+        headless: bool = True,
+        context: str | None = None,
+        telemetry_sink_factory: Callable[[int], Any] | None = None,
+    ) -> None:
+        self.num_envs = num_envs
+        self.closed = False
+
+        self.remotes = ()
+        self.processes = []
+        self._memories = {}
+        self._buffers = {}
+
+        env_kwargs = {
+            "domain": domain,
+            "task": task,
+            "act_freq": act_freq,
+            "emulation_speed": emulation_speed,
+            "headless": headless,
+        }
+
+        ctx = mp.get_context(context)
+
+        # Workers must share our tracker, otherwise each one unlinks the buffers when it exits
+        resource_tracker.ensure_running()
+
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(num_envs)])
+        for index, (remote, work_remote) in enumerate(zip(self.remotes, work_remotes)):
+            process = ctx.Process(
+                target=_worker,
+                args=(index, work_remote, remote, env_kwargs, telemetry_sink_factory),
+                daemon=True,
+            )
+            process.start()
+            work_remote.close()
+            self.processes.append(process)
+
+        try:
+            spaces = self._receive_all()
+            self.observation_space, self.action_num = spaces[0]
+
+            self._memories, specs = self._allocate(
+                {
+                    "observations": ((num_envs, self.observation_space), np.float32),
+                    "final_observations": (
+                        (num_envs, self.observation_space),
+                        np.float32,
+                    ),
+                    "actions": ((num_envs, self.action_num), np.float32),
+                    "rewards": ((num_envs,), np.float64),
+                    "dones": ((num_envs,), np.bool_),
+                    "truncateds": ((num_envs,), np.bool_),
+                }
+            )
+        except Exception:
+            self.close()
+            raise
+
+        for remote in self.remotes:
+            remote.send(specs)
+
+    @property
+    def observations(self) -> np.ndarray:
+        return self._buffers["observations"]
+
+    @property
+    def final_observations(self) -> np.ndarray:
+        return self._buffers["final_observations"]
+
+    @property
+    def actions(self) -> np.ndarray:
+        return self._buffers["actions"]
+
+    @property
+    def rewards(self) -> np.ndarray:
+        return self._buffers["rewards"]
+
+    @property
+    def dones(self) -> np.ndarray:
+        return self._buffers["dones"]
+
+    @property
+    def truncateds(self) -> np.ndarray:
+        return self._buffers["truncateds"]
+
+    def _allocate(self, layout: dict) -> tuple[dict, dict]:
+        memories, specs = {}, {}
+        for key, (shape, dtype) in layout.items():
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            memory = shared_memory.SharedMemory(create=True, size=size)
+            memories[key] = memory
+            self._buffers[key] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+            self._buffers[key].fill(0)
+            specs[key] = (memory.name, shape, np.dtype(dtype).str)
+        return memories, specs
+
+    def _receive_all(self) -> list:
+        results = [remote.recv() for remote in self.remotes]
+        errors = [data for status, data in results if status == "error"]
+        if errors:
+            raise RuntimeError(f"Vector environment worker failed:\n{errors[0]}")
+        return [data for _, data in results]
+
+    def _send_all(self, command: str, data=None) -> list:
+        for remote in self.remotes:
+            remote.send((command, data))
+        return self._receive_all()
+
+    def set_seed(self, seed: int) -> None:
+        for index, remote in enumerate(self.remotes):
+            remote.send(("seed", seed + index))
+        self._receive_all()
+
+    def game_stats(self) -> list[dict]:
+        # Decoded `_generate_game_stats` of every sub-environment's current frame
+        return self._send_all("game_stats")
+
+    def set_attr(self, name: str, values: list) -> None:
+        # One value per sub-environment
+        for remote, value in zip(self.remotes, values):
+            remote.send(("set_attr", (name, value)))
+        self._receive_all()
+
+    def reset(self) -> np.ndarray:
+        self._send_all("reset")
+        return self.observations
+
+    def step_async(self, actions) -> None:
+        self.actions[:] = np.asarray(actions, dtype=np.float32).reshape(
+            self.num_envs, self.action_num
+        )
+        for remote in self.remotes:
+            remote.send(("step", None))
+
+    def step_wait(self) -> tuple:
+        self._receive_all()
+        return self.observations, self.rewards, self.dones, self.truncateds
+
+    def step(self, actions) -> tuple:
+        self.step_async(actions)
+        return self.step_wait()
+
+    def sample_action(self) -> np.ndarray:
+        return np.random.rand(self.num_envs, self.action_num).astype(np.float32)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+
+        for remote, process in zip(self.remotes, self.processes):
+            try:
+                if process.is_alive():
+                    remote.send(("close", None))
+                    remote.recv()
+            except (BrokenPipeError, EOFError):
+                pass
+            remote.close()
+
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        self._buffers = {}
+        for memory in self._memories.values():
+            try:
+                memory.close()
+            except BufferError:
+                # A caller still holds one of the returned arrays
+                pass
+            memory.unlink()
+        self._memories = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+
+class SyncVectorPyboyEnvironment:
+    """
+    Same interface as `VectorPyboyEnvironment` with every environment in this process.
+
+    Environments with a `decode_actions` method get the whole action batch decoded in one
+    call. The returned arrays are reused by the next call, as with the shared buffers.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        task: str,
+        act_freq: int,
+        num_envs: int,
+        emulation_speed: int = 0,
+        headless: bool = True,
+        telemetry_sink_factory: Callable[[int], Any] | None = None,
+    ) -> None:
+        self.num_envs = num_envs
+        self.closed = False
+
+        self.envs = [
+            suite.make(
+                domain,
+                task,
+                act_freq,
+                emulation_speed=emulation_speed,
+                headless=headless,
+                telemetry_sink=(
+                    None
+                    if telemetry_sink_factory is None
+                    else telemetry_sink_factory(index)
+                ),
+            )
+            for index in range(num_envs)
+        ]
+        self.observation_space = self.envs[0].observation_space
+        self.action_num = self.envs[0].action_num
+
+        self.observations = np.zeros((num_envs, self.observation_space), np.float32)
+        self.final_observations = np.zeros_like(self.observations)
+        self.rewards = np.zeros(num_envs, np.float64)
+        self.dones = np.zeros(num_envs, np.bool_)
+        self.truncateds = np.zeros(num_envs, np.bool_)
+
+    def set_seed(self, seed: int) -> None:
+        for index, env in enumerate(self.envs):
+            env.set_seed(seed + index)
+
+    def set_attr(self, name: str, values: list) -> None:
+        for env, value in zip(self.envs, values):
+            setattr(env, name, value)
+
+    def game_stats(self) -> list[dict]:
+        return [env._generate_game_stats().copy() for env in self.envs]
+
+    def reset(self) -> np.ndarray:
+        for index, env in enumerate(self.envs):
+            self.observations[index] = env.reset()
+        return self.observations
+
+    def step(self, actions) -> tuple:
+        actions = np.asarray(actions, dtype=np.float32).reshape(
+            self.num_envs, self.action_num
+        )
+        decode = getattr(self.envs[0], "decode_actions", None)
+        if decode is not None:
+            actions = decode(actions).tolist()
+
+        for index, (env, action) in enumerate(zip(self.envs, actions)):
+            state, reward, done, truncated = env.step(action)
+            if done or truncated:
+                self.final_observations[index] = state
+                state = env.reset()
+            self.observations[index] = state
+            self.rewards[index] = reward
+            self.dones[index] = done
+            self.truncateds[index] = truncated
+        return self.observations, self.rewards, self.dones, self.truncateds
+
+    def sample_action(self) -> np.ndarray:
+        return np.random.rand(self.num_envs, self.action_num).astype(np.float32)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for env in self.envs:
+            env.pyboy.stop(save=False)
+            env.telemetry.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()